@@ -28,6 +28,29 @@ class DataAggregator:
         log.info(f"Loaded {len(data)} records from {len(file_paths)} files")
         return data
 
+    def iter_json_records(self, file_paths):
+        """
+        Stream records from JSON files, holding one file in memory at a time
+
+        Args:
+            file_paths: JSON file paths (list or object per file)
+
+        Yields:
+            Records in file order
+        """
+        for file_path in file_paths:
+            try:
+                with open(file_path, 'r') as f:
+                    content = json.load(f)
+            except Exception as e:
+                log.error(f"Error loading {file_path}: {e}")
+                continue
+
+            if isinstance(content, list):
+                yield from content
+            else:
+                yield content
+
     def json_to_dataframe(self, json_data):
         """Convert JSON data to DataFrame"""
         try:
@@ -1,19 +1,79 @@
 """Benchmarks for the classify (ML) module."""
+import multiprocessing
+import random
+import time
 import pytest
 
+WORKERS = 4
+
+
+def _smaps_kb():
+    """Private (unshared) and proportional set size of this process in kB."""
+    fields = {}
+    with open("/proc/self/smaps_rollup") as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) == 3 and parts[2] == "kB":
+                fields[parts[0].rstrip(":")] = int(parts[1])
+    return fields["Private_Clean"] + fields["Private_Dirty"], fields["Pss"]
+
+
+def _load_worker(kind, model_path, barrier, queue):
+    """Load a model in a fresh process and report load time and memory growth."""
+    from classify.classify import DocumentClassifier
+
+    private_before, pss_before = _smaps_kb()
+    began = time.perf_counter()
+    classifier = DocumentClassifier()
+    if kind == "joblib":
+        classifier.load_model(model_path)
+    else:
+        classifier.load_artifact(model_path, vocabulary=kind)
+    classifier.predict(["warm up the vocabulary and coefficient pages"])
+    elapsed = time.perf_counter() - began
+
+    # Measure while every worker holds the model, so shared pages are split
+    barrier.wait()
+    private_after, pss_after = _smaps_kb()
+    queue.put((elapsed, private_after - private_before, pss_after - pss_before))
+    barrier.wait()
+
+
+@pytest.fixture(scope="module")
+def trained_classifier(training_data_session):
+    """Create and train classifier once per module."""
+    from classify.classify import DocumentClassifier
+    texts, labels = training_data_session
+    classifier = DocumentClassifier()
+    classifier.train(texts, labels)
+    return classifier
+
+
+@pytest.fixture(scope="module")
+def large_model_paths(tmp_path_factory):
+    """A large-vocabulary model saved as a joblib file and as an artifact."""
+    from classify.classify import DocumentClassifier
+
+    rng = random.Random(0)
+    words = ["".join(rng.choice("abcdefghijklmnopqrst") for _ in range(rng.randint(3, 9)))
+             for _ in range(40_000)]
+    texts = [" ".join(rng.choice(words) for _ in range(150)) for _ in range(4000)]
+    labels = [f"label_{i % 20}" for i in range(len(texts))]
+
+    classifier = DocumentClassifier()
+    classifier.model = classifier.create_pipeline().set_params(tfidf__max_features=None)
+    classifier.model.fit(texts, labels)
+    classifier.is_trained = True
+
+    root = tmp_path_factory.mktemp("models")
+    classifier.save_model(root / "model.joblib")
+    classifier.save_artifact(root / "artifact")
+    return {"joblib": str(root / "model.joblib"), "artifact": str(root / "artifact")}
+
 
 class TestClassifyBenchmarks:
     """Benchmark tests for document classification operations."""
 
-    @pytest.fixture(scope="class")
-    def trained_classifier(self, training_data):
-        """Create and train classifier once per class."""
-        from classify.classify import DocumentClassifier
-        texts, labels = training_data
-        classifier = DocumentClassifier()
-        classifier.train(texts, labels)
-        return classifier
-
     def test_train_classifier(self, benchmark, training_data):
         """Benchmark classifier training."""
         from classify.classify import DocumentClassifier
@@ -51,9 +111,168 @@ class TestClassifyBenchmarks:
         result = benchmark(trained_classifier.predict, texts)
         assert len(result) == 500
 
+    def test_predict_batch_10k(self, benchmark, trained_classifier, training_data):
+        """Benchmark chunked batch inference with top-k (10k docs)."""
+        texts = training_data[0] * 100
+        result = benchmark(trained_classifier.predict_batch, texts)
+        assert len(result['labels']) == 10_000
+        assert result['top_labels'].shape == (10_000, 3)
+
+    def test_predict_batch_100k(self, benchmark, trained_classifier, training_data):
+        """Benchmark chunked batch inference from a generator (100k docs)."""
+        texts = training_data[0]
+
+        def predict_stream():
+            stream = (texts[i % len(texts)] for i in range(100_000))
+            return trained_classifier.predict_batch(stream)
+
+        result = benchmark.pedantic(predict_stream, rounds=3, iterations=1)
+        assert len(result['labels']) == 100_000
+
+    def test_predict_and_proba_10k(self, benchmark, trained_classifier, training_data):
+        """Baseline: separate predict and predict_proba calls (10k docs)."""
+        texts = training_data[0] * 100
+
+        def predict_twice():
+            return trained_classifier.predict(texts), trained_classifier.predict_proba(texts)
+
+        labels, _ = benchmark(predict_twice)
+        assert len(labels) == 10_000
+
+    @pytest.mark.parametrize("estimator", ["nb", "sgd"])
+    def test_train_stream_100k(self, benchmark, training_data, estimator):
+        """Benchmark out-of-core training from 10k-document batches (100k docs)."""
+        from classify.classify import DocumentClassifier
+        texts, labels = training_data
+        classes = sorted(set(labels))
+
+        def batches():
+            for _ in range(10):
+                yield texts * 100, labels * 100
+
+        def train_stream():
+            classifier = DocumentClassifier()
+            return classifier.train_stream(batches(), classes, estimator=estimator)
+
+        result = benchmark.pedantic(train_stream, rounds=3, iterations=1)
+        assert result == 100_000
+
+    @pytest.mark.parametrize("cached", [False, True], ids=["refit_tfidf", "cached_tfidf"])
+    def test_grid_search(self, benchmark, training_data, cached):
+        """Benchmark an alpha x ngram grid with and without the TF-IDF cache."""
+        from sklearn.model_selection import GridSearchCV
+        from classify.train import TrainingPipeline
+        texts, labels = training_data
+        grid = {'tfidf__ngram_range': [(1, 1), (1, 2)],
+                'classifier__alpha': [0.001, 0.01, 0.1, 0.5, 1.0]}
+        pipeline = TrainingPipeline()
+        documents = [" ".join([text] * 50) for text in texts]
+        pipeline.load_data(documents * 20, labels * 20)
+
+        def search():
+            if cached:
+                return pipeline.search(grid, cv=3, n_jobs=1, refit=False)['best_score']
+            search = GridSearchCV(pipeline.classifier.create_pipeline(), grid, cv=3, refit=False)
+            return search.fit(pipeline.X_train, pipeline.y_train).best_score_
+
+        result = benchmark.pedantic(search, rounds=2, iterations=1)
+        assert result > 0.9
+
     def test_create_pipeline(self, benchmark):
         """Benchmark pipeline creation."""
         from classify.classify import DocumentClassifier
         classifier = DocumentClassifier()
         result = benchmark(classifier.create_pipeline)
         assert result is not None
+
+
+class TestModelArtifactBenchmarks:
+    """Load time and per-worker memory of joblib files vs memory-mapped artifacts."""
+
+    @pytest.mark.benchmark(group="model-load")
+    def test_load_joblib(self, benchmark, large_model_paths):
+        """Benchmark loading the pickled pipeline."""
+        from classify.classify import DocumentClassifier
+        classifier = DocumentClassifier()
+        benchmark(classifier.load_model, large_model_paths["joblib"])
+        assert classifier.is_trained
+
+    @pytest.mark.benchmark(group="model-load")
+    @pytest.mark.parametrize("vocabulary", ["compact", "dict"])
+    def test_load_artifact(self, benchmark, large_model_paths, vocabulary):
+        """Benchmark loading the artifact with memory-mapped arrays."""
+        from classify.classify import DocumentClassifier
+        classifier = DocumentClassifier()
+        metadata = benchmark(classifier.load_artifact, large_model_paths["artifact"],
+                             vocabulary=vocabulary)
+        assert metadata["vocabulary_size"] > 100_000
+
+    def test_worker_memory_comparison(self, large_model_paths):
+        """Compare cold-start time and per-worker memory (not a benchmark, just report)."""
+        context = multiprocessing.get_context("spawn")
+        results = {}
+
+        for kind, path in (("joblib", large_model_paths["joblib"]),
+                           ("compact", large_model_paths["artifact"]),
+                           ("dict", large_model_paths["artifact"])):
+            barrier = context.Barrier(WORKERS)
+            queue = context.Queue()
+            processes = [context.Process(target=_load_worker, args=(kind, path, barrier, queue))
+                         for _ in range(WORKERS)]
+            for process in processes:
+                process.start()
+            results[kind] = [queue.get(timeout=600) for _ in processes]
+            for process in processes:
+                process.join()
+
+        print(f"\nModel load across {WORKERS} spawned workers:")
+        for kind, rows in results.items():
+            seconds = sum(row[0] for row in rows) / len(rows)
+            private = sum(row[1] for row in rows) / len(rows)
+            pss = sum(row[2] for row in rows) / len(rows)
+            print(f"  {kind}: {seconds * 1000:.0f} ms cold start, "
+                  f"{private / 1024:.1f} MB private, {pss / 1024:.1f} MB PSS per worker")
+
+        assert all(len(rows) == WORKERS for rows in results.values())
+
+
+class TestServingBenchmarks:
+    """Single-document requests from many threads, direct vs micro-batched."""
+
+    THREADS = 16
+    REQUESTS_PER_THREAD = 50
+
+    def _run_clients(self, predict, texts):
+        from concurrent.futures import ThreadPoolExecutor
+
+        def client(offset):
+            return [predict(texts[(offset + i) % len(texts)])
+                    for i in range(self.REQUESTS_PER_THREAD)]
+
+        with ThreadPoolExecutor(max_workers=self.THREADS) as pool:
+            return sum(len(labels) for labels in pool.map(client, range(self.THREADS)))
+
+    @pytest.mark.benchmark(group="serving")
+    def test_direct_single_predict(self, benchmark, trained_classifier, training_data):
+        """Benchmark every thread calling predict with one document."""
+        texts = training_data[0]
+        result = benchmark.pedantic(self._run_clients, args=(
+            lambda text: trained_classifier.predict([text])[0], texts), rounds=3, iterations=1)
+        assert result == self.THREADS * self.REQUESTS_PER_THREAD
+
+    @pytest.mark.benchmark(group="serving")
+    @pytest.mark.parametrize("max_wait", [0.001, 0.005, 0.02])
+    def test_micro_batched_predict(self, benchmark, trained_classifier, training_data, max_wait):
+        """Benchmark the same load through a MicroBatcher and report its latency stats."""
+        from classify.serving import MicroBatcher
+        texts = training_data[0]
+
+        with MicroBatcher(trained_classifier, max_batch_size=64, max_wait=max_wait) as batcher:
+            result = benchmark.pedantic(self._run_clients, args=(batcher.predict, texts),
+                                        rounds=3, iterations=1)
+        stats = batcher.stats()
+        benchmark.extra_info.update(mean_batch_size=stats['mean_batch_size'],
+                                    latency_ms=stats['latency_ms'])
+        print(f"\nmax_wait={max_wait}: mean batch {stats['mean_batch_size']:.1f}, "
+              f"latency {stats['latency_ms']}, batch sizes {stats['batch_size_histogram']}")
+        assert result == self.THREADS * self.REQUESTS_PER_THREAD
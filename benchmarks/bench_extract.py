@@ -1,6 +1,10 @@
 """Benchmarks for the extract (NLP) module."""
+import json
+from pathlib import Path
 import pytest
 
+GAZETTEER_FILE = Path(__file__).parent.parent / "config" / "gazetteers" / "ecommerce.yaml"
+
 
 class TestExtractBenchmarks:
     """Benchmark tests for entity extraction operations."""
@@ -43,3 +47,237 @@ class TestExtractBenchmarks:
 
         result = benchmark(extract_all)
         assert len(result) == len(texts)
+
+
+class TestPipelinePruningBenchmarks:
+    """Compare the full spaCy pipeline against the NER-only pruned pipeline."""
+
+    @pytest.fixture(scope="class")
+    def full_extractor(self):
+        from extract.extract import EntityExtractor
+        return EntityExtractor()
+
+    @pytest.fixture(scope="class")
+    def pruned_extractor(self):
+        from extract.extract import EntityExtractor
+        return EntityExtractor(prune=True)
+
+    @pytest.mark.benchmark(group="ner-load")
+    def test_load_full_pipeline(self, benchmark):
+        """Benchmark loading the full pipeline."""
+        from extract.extract import EntityExtractor
+        result = benchmark(EntityExtractor)
+        assert "parser" in result.nlp.pipe_names
+
+    @pytest.mark.benchmark(group="ner-load")
+    def test_load_pruned_pipeline(self, benchmark):
+        """Benchmark loading the pruned pipeline."""
+        from extract.extract import EntityExtractor
+        result = benchmark(EntityExtractor, prune=True)
+        assert "parser" not in result.nlp.pipe_names
+
+    @pytest.mark.benchmark(group="ner-medium")
+    def test_full_medium_text(self, benchmark, full_extractor, sample_medium_text):
+        """Benchmark the full pipeline on medium text."""
+        result = benchmark(full_extractor.extract_entities, sample_medium_text)
+        assert isinstance(result, list)
+
+    @pytest.mark.benchmark(group="ner-medium")
+    def test_pruned_medium_text(self, benchmark, pruned_extractor, full_extractor, sample_medium_text):
+        """Benchmark the pruned pipeline on medium text."""
+        result = benchmark(pruned_extractor.extract_entities, sample_medium_text)
+        assert result == full_extractor.extract_entities(sample_medium_text)
+
+    @pytest.mark.benchmark(group="ner-long")
+    def test_full_long_text(self, benchmark, full_extractor, sample_long_text):
+        """Benchmark the full pipeline on long text."""
+        result = benchmark(full_extractor.extract_entities, sample_long_text)
+        assert isinstance(result, list)
+
+    @pytest.mark.benchmark(group="ner-long")
+    def test_pruned_long_text(self, benchmark, pruned_extractor, sample_long_text):
+        """Benchmark the pruned pipeline on long text."""
+        result = benchmark(pruned_extractor.extract_entities, sample_long_text)
+        assert isinstance(result, list)
+
+    @pytest.mark.benchmark(group="ner-batch")
+    def test_full_batch(self, benchmark, full_extractor, sample_texts_batch):
+        """Benchmark the full pipeline on a batch."""
+        result = benchmark(full_extractor.process_batch, sample_texts_batch)
+        assert len(result) == len(sample_texts_batch)
+
+    @pytest.mark.benchmark(group="ner-batch")
+    def test_pruned_batch(self, benchmark, pruned_extractor, sample_texts_batch):
+        """Benchmark the pruned pipeline on a batch."""
+        result = benchmark(pruned_extractor.process_batch, sample_texts_batch)
+        assert len(result) == len(sample_texts_batch)
+
+
+class TestParallelNERBenchmarks:
+    """Benchmarks for multi-process NER via nlp.pipe."""
+
+    @pytest.fixture(scope="class")
+    def extractor(self):
+        from extract.extract import EntityExtractor
+        return EntityExtractor(prune=True)
+
+    @pytest.mark.parametrize("batch_size", [16, 64, 256])
+    def test_batch_size(self, benchmark, extractor, sample_texts_batch, batch_size):
+        """Benchmark single-process batches of different sizes."""
+        result = benchmark(extractor.process_batch, sample_texts_batch, batch_size=batch_size)
+        assert len(result) == len(sample_texts_batch)
+
+    def test_iter_entities_as_tuples(self, benchmark, extractor, sample_texts_batch):
+        """Benchmark streaming (id, text) tuples with both output formats."""
+
+        def run():
+            pairs = ((i, text) for i, text in enumerate(sample_texts_batch))
+            return list(extractor.iter_entities(pairs, as_tuples=True))
+
+        result = benchmark(run)
+        assert [r[0] for r in result] == list(range(len(sample_texts_batch)))
+
+    def test_ner_scaling_comparison(self, extractor, sample_medium_text):
+        """Compare NER scaling across process counts (not a benchmark, just report)."""
+        import time
+
+        texts = [sample_medium_text] * 200
+        results = {}
+
+        for n_process in [1, 2, 4, 8]:
+            start = time.perf_counter()
+            for _ in extractor.iter_entities(texts, batch_size=25, n_process=n_process):
+                pass
+            results[n_process] = time.perf_counter() - start
+
+        print("\nNER Scaling Results:")
+        baseline = results[1]
+        for n_process, elapsed in results.items():
+            speedup = baseline / elapsed
+            print(f"  {n_process} processes: {elapsed:.3f}s (speedup: {speedup:.2f}x)")
+
+
+class TestEntityCacheBenchmarks:
+    """Benchmarks for cached entity extraction."""
+
+    @pytest.fixture(scope="class")
+    def cached_extractor(self):
+        from extract.extract import EntityExtractor, entity_cache
+        return EntityExtractor(cache=entity_cache())
+
+    def test_cached_long_text(self, benchmark, cached_extractor, sample_long_text):
+        """Benchmark repeated extraction served from the cache."""
+        cached_extractor.extract_entities(sample_long_text)
+        result = benchmark(cached_extractor.extract_entities, sample_long_text)
+        assert isinstance(result, list)
+
+    def test_cached_batch(self, benchmark, cached_extractor, sample_texts_batch):
+        """Benchmark a batch where every text is already cached."""
+        cached_extractor.process_batch(sample_texts_batch)
+        result = benchmark(cached_extractor.process_batch, sample_texts_batch)
+        assert len(result) == len(sample_texts_batch)
+
+
+class TestShardedNERBenchmarks:
+    """Benchmarks for long-document sharding."""
+
+    @pytest.fixture
+    def very_long_text(self, sample_long_text):
+        return "\n\n".join([sample_long_text] * 50)
+
+    @pytest.fixture(scope="class")
+    def sharded_extractor(self):
+        from extract.extract import EntityExtractor
+        return EntityExtractor(prune=True, shard_size=20000)
+
+    @pytest.fixture(scope="class")
+    def unsharded_extractor(self):
+        from extract.extract import EntityExtractor
+        return EntityExtractor(prune=True, shard_size=None)
+
+    @pytest.mark.benchmark(group="ner-long-document")
+    def test_unsharded(self, benchmark, unsharded_extractor, very_long_text):
+        """Benchmark parsing a long document as a single Doc."""
+        result = benchmark(unsharded_extractor.extract_entities, very_long_text)
+        assert isinstance(result, list)
+
+    @pytest.mark.benchmark(group="ner-long-document")
+    def test_sharded(self, benchmark, sharded_extractor, very_long_text):
+        """Benchmark parsing a long document in 20k-character shards."""
+        result = benchmark(sharded_extractor.extract_entities, very_long_text)
+        assert isinstance(result, list)
+
+    def test_shard_bounds_cover_text(self, very_long_text):
+        """Shards overlap and together cover the whole document."""
+        from extract.extract import shard_bounds
+
+        bounds = shard_bounds(very_long_text, 20000, 200)
+        assert bounds[0][0] == 0 and bounds[-1][1] == len(very_long_text)
+        for (_, end), (start, _) in zip(bounds, bounds[1:]):
+            assert start <= end
+
+
+class TestGazetteerBenchmarks:
+    """Benchmarks for the rule-based gazetteer fast path on seed_data/ecommerce."""
+
+    @pytest.fixture(scope="class")
+    def ecommerce_texts(self):
+        root = Path(__file__).parent.parent / "seed_data" / "ecommerce"
+        products = json.loads((root / "products.json").read_text())
+        reviews = json.loads((root / "reviews.json").read_text())
+        texts = [f"{p['product_id']} {p['name']} by {p['brand']}. {p['description']}"
+                 for p in products]
+        texts += [f"{r['review_id']} on {r['product_id']}: {r['title']}. {r['content']}"
+                  for r in reviews]
+        return texts * 20
+
+    @pytest.fixture(scope="class")
+    def gazetteer_extractor(self):
+        from extract.extract import EntityExtractor
+        return EntityExtractor(gazetteer=GAZETTEER_FILE, statistical=False)
+
+    @pytest.fixture(scope="class")
+    def model_extractor(self):
+        from extract.extract import EntityExtractor
+        return EntityExtractor()
+
+    @pytest.mark.benchmark(group="ner-ecommerce")
+    def test_gazetteer_only(self, benchmark, gazetteer_extractor, ecommerce_texts):
+        """Benchmark the tokenizer + EntityRuler pipeline."""
+        result = benchmark(gazetteer_extractor.process_batch, ecommerce_texts)
+        assert len(result) == len(ecommerce_texts)
+        assert ('PROD-001', 'PRODUCT_ID') in result[0]
+
+    @pytest.mark.benchmark(group="ner-ecommerce")
+    def test_full_model(self, benchmark, model_extractor, ecommerce_texts):
+        """Benchmark the statistical model on the same documents."""
+        result = benchmark(model_extractor.process_batch, ecommerce_texts)
+        assert len(result) == len(ecommerce_texts)
+
+
+class TestEntityTableBenchmarks:
+    """Benchmarks for columnar entity output."""
+
+    @pytest.fixture(scope="class")
+    def extractor(self):
+        from extract.extract import EntityExtractor
+        return EntityExtractor(prune=True)
+
+    @pytest.mark.benchmark(group="ner-output")
+    def test_tuple_lists(self, benchmark, extractor, sample_texts_batch):
+        """Benchmark (text, label) lists flattened into a DataFrame."""
+        import pandas as pd
+
+        def run():
+            rows = [{'doc_id': i, 'text': text, 'label': label}
+                    for i, entities in enumerate(extractor.process_batch(sample_texts_batch))
+                    for text, label in entities]
+            return pd.json_normalize(rows)
+
+        benchmark(run)
+
+    @pytest.mark.benchmark(group="ner-output")
+    def test_entity_table(self, benchmark, extractor, sample_texts_batch):
+        """Benchmark building the columnar entity table directly."""
+        result = benchmark(extractor.entity_table, sample_texts_batch)
+        assert list(result.columns) == ['doc_id', 'start', 'end', 'label', 'text']
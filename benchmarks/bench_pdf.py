@@ -0,0 +1,149 @@
+"""Benchmarks for PDF text extraction and its backends."""
+import multiprocessing
+import resource
+import time
+import pytest
+from extract.pdf_backends import available_backends, get_backend
+
+BACKENDS = available_backends()
+
+
+def _measure(backend_name, pdf_path, queue):
+    """Extract every page in a fresh process and report pages, seconds and peak RSS."""
+    began = time.perf_counter()
+    pages = sum(1 for _ in get_backend(backend_name).iter_pages(pdf_path))
+    elapsed = time.perf_counter() - began
+    peak_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    queue.put((pages, elapsed, peak_kb))
+
+
+class TestPDFExtractionBenchmarks:
+    """Benchmarks for sequential vs parallel PDF extraction."""
+
+    @pytest.mark.benchmark(group="pdf-long-file")
+    @pytest.mark.parametrize("workers", [1, 4])
+    def test_long_file(self, benchmark, sample_pdf_files, workers):
+        """Benchmark a 400-page PDF split into page ranges."""
+        from extract.pdf_extractor import PDFExtractor
+
+        extractor = PDFExtractor(chunk_size=50, workers=workers)
+        result = benchmark(extractor.extract_with_stats, sample_pdf_files[0])
+        assert result['pages'] == 400
+
+    @pytest.mark.benchmark(group="pdf-batch")
+    @pytest.mark.parametrize("workers", [1, 4])
+    def test_batch(self, benchmark, sample_pdf_files, workers):
+        """Benchmark batch extraction across files."""
+        from extract.pdf_extractor import PDFExtractor
+
+        extractor = PDFExtractor(chunk_size=50, workers=workers)
+        result = benchmark(extractor.batch_extract, sample_pdf_files, with_stats=True)
+        assert sum(stats['pages'] for stats in result.values()) == 600
+
+    @pytest.mark.benchmark(group="pdf-long-file")
+    def test_iter_pages(self, benchmark, sample_pdf_files):
+        """Benchmark streaming pages without building the full text."""
+        from extract.pdf_extractor import PDFExtractor
+
+        extractor = PDFExtractor()
+        result = benchmark(lambda: sum(len(text) for _, text in extractor.iter_pages(sample_pdf_files[0])))
+        assert result > 0
+
+
+
+class TestPDFBackendBenchmarks:
+    """Pages/sec and peak RSS per installed PDF backend."""
+
+    @pytest.mark.benchmark(group="pdf-backend")
+    @pytest.mark.parametrize("backend", BACKENDS)
+    def test_backend_throughput(self, benchmark, sample_pdf_files, backend):
+        """Benchmark extracting the 400-page PDF with one backend."""
+        engine = get_backend(backend)
+        result = benchmark(lambda: sum(len(text) for text in engine.iter_pages(sample_pdf_files[0])))
+        assert result > 0
+
+    @pytest.mark.benchmark(group="pdf-backend")
+    def test_extractor_auto(self, benchmark, sample_pdf_files):
+        """Benchmark PDFExtractor with automatic backend selection."""
+        from extract.pdf_extractor import PDFExtractor
+
+        extractor = PDFExtractor()
+        result = benchmark(extractor.extract_with_stats, sample_pdf_files[0])
+        assert result['pages'] == 400
+
+    def test_backend_comparison(self, sample_pdf_files):
+        """Compare pages/sec and peak RSS across backends (not a benchmark, just report)."""
+        context = multiprocessing.get_context("spawn")
+        results = {}
+
+        for backend in BACKENDS:
+            queue = context.Queue()
+            process = context.Process(target=_measure, args=(backend, sample_pdf_files[0], queue))
+            process.start()
+            results[backend] = queue.get(timeout=600)
+            process.join()
+
+        print("\nPDF Backend Results:")
+        for backend, (pages, elapsed, peak_kb) in results.items():
+            print(f"  {backend}: {pages / elapsed:.1f} pages/sec, "
+                  f"peak RSS {peak_kb / 1024:.1f} MB ({get_backend(backend).version()})")
+
+        assert all(pages == 400 for pages, _, _ in results.values())
+
+
+class TestPDFTextCacheBenchmarks:
+    """Benchmarks for re-extracting an unchanged PDF archive."""
+
+    @pytest.mark.benchmark(group="pdf-cache")
+    def test_uncached_batch(self, benchmark, sample_pdf_files):
+        """Benchmark parsing every file."""
+        from extract.pdf_extractor import PDFExtractor
+
+        result = benchmark(PDFExtractor().batch_extract, sample_pdf_files)
+        assert len(result) == len(sample_pdf_files)
+
+    @pytest.mark.benchmark(group="pdf-cache")
+    def test_cached_batch(self, benchmark, sample_pdf_files, tmp_path):
+        """Benchmark a nightly re-run where every file is unchanged."""
+        from extract.pdf_extractor import PDFExtractor, pdf_text_cache
+
+        extractor = PDFExtractor(cache=pdf_text_cache(str(tmp_path / "cache")))
+        extractor.batch_extract(sample_pdf_files)
+        result = benchmark(extractor.batch_extract, sample_pdf_files)
+        assert len(result) == len(sample_pdf_files)
+        assert extractor.cache_hits >= len(sample_pdf_files)
+
+
+class TestGuardedExtractionBenchmarks:
+    """Overhead of isolating each file in a killable worker."""
+
+    @pytest.mark.benchmark(group="pdf-guarded")
+    @pytest.mark.parametrize("guarded", [False, True])
+    def test_batch(self, benchmark, sample_pdf_files, guarded):
+        """Benchmark a batch with and without guarded workers."""
+        from extract.pdf_extractor import PDFExtractor
+
+        extractor = PDFExtractor(workers=2, guarded=guarded, page_timeout=60)
+        result = benchmark(extractor.batch_extract, sample_pdf_files, with_stats=True)
+        assert all(stats['failure'] is None for stats in result.values())
+
+
+class TestLayoutBlockBenchmarks:
+    """Structured block extraction and header/footer removal."""
+
+    @pytest.mark.benchmark(group="pdf-blocks")
+    def test_plain_text(self, benchmark, sample_report_pdf):
+        """Benchmark plain page text extraction."""
+        from extract.pdf_extractor import PDFExtractor
+
+        result = benchmark(PDFExtractor().extract_text, sample_report_pdf)
+        assert result
+
+    @pytest.mark.benchmark(group="pdf-blocks")
+    @pytest.mark.parametrize("drop_furniture", [False, True])
+    def test_blocks(self, benchmark, sample_report_pdf, drop_furniture):
+        """Benchmark block extraction with and without furniture removal."""
+        from extract.pdf_extractor import PDFExtractor
+
+        result = benchmark(PDFExtractor().extract_blocks, sample_report_pdf, drop_furniture)
+        assert len(result) == (3800 if drop_furniture else 4000)
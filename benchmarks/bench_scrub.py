@@ -38,3 +38,207 @@ class TestScrubBenchmarks:
 
         results = benchmark(batch_normalize, sample_texts_batch)
         assert len(results) == len(sample_texts_batch)
+
+    def test_clean_documents_inline(self, benchmark, sample_texts_batch):
+        """Benchmark streaming clean_documents without a pool."""
+        from scrub.clean import clean_documents
+        documents = [{"content": t} for t in sample_texts_batch]
+
+        def clean_all():
+            return list(clean_documents(documents, workers=1, copy=True))
+
+        results = benchmark(clean_all)
+        assert len(results) == len(sample_texts_batch)
+
+    def test_clean_documents_parallel(self, benchmark, sample_long_text):
+        """Benchmark streaming clean_documents across 4 workers."""
+        from scrub.clean import clean_documents
+        documents = [{"content": sample_long_text}] * 200
+
+        def clean_all():
+            return list(clean_documents(documents, workers=4, chunk_size=25, copy=True))
+
+        results = benchmark(clean_all)
+        assert len(results) == 200
+
+
+def legacy_normalize_text(text):
+    """Reference copy of the original multi-pass normalize_text."""
+    import re
+    if not text:
+        return ''
+    text = re.sub(re.compile('<.*?>'), '', text)
+    text = re.sub(r'\s+', ' ', text)
+    text = text.encode("utf-8", errors="ignore").decode("utf-8").strip()
+    text = re.sub(r'[^\w\s\.\,\!\?\-]', '', text)
+    return text.encode("utf-8", errors="ignore").decode("utf-8")
+
+
+class TestTextNormalizerBenchmarks:
+    """Compare the compiled TextNormalizer against the legacy multi-pass path."""
+
+    @pytest.mark.benchmark(group="normalize-long")
+    def test_legacy_long_text(self, benchmark, sample_long_text):
+        """Baseline: legacy normalize on long text."""
+        result = benchmark(legacy_normalize_text, sample_long_text)
+        assert isinstance(result, str)
+
+    @pytest.mark.benchmark(group="normalize-long")
+    def test_normalizer_long_text(self, benchmark, sample_long_text):
+        """Benchmark TextNormalizer on long text."""
+        from scrub.clean import TextNormalizer
+        normalizer = TextNormalizer()
+        result = benchmark(normalizer.normalize, sample_long_text)
+        assert result == legacy_normalize_text(sample_long_text)
+
+    @pytest.mark.benchmark(group="normalize-html")
+    def test_legacy_html_text(self, benchmark, sample_html_text):
+        """Baseline: legacy normalize on HTML text."""
+        result = benchmark(legacy_normalize_text, sample_html_text)
+        assert isinstance(result, str)
+
+    @pytest.mark.benchmark(group="normalize-html")
+    def test_normalizer_html_text(self, benchmark, sample_html_text):
+        """Benchmark TextNormalizer on HTML text."""
+        from scrub.clean import TextNormalizer
+        normalizer = TextNormalizer()
+        result = benchmark(normalizer.normalize, sample_html_text)
+        assert result == legacy_normalize_text(sample_html_text)
+
+    def test_parser_mode_html_text(self, benchmark, sample_html_text):
+        """Benchmark html.parser-based stripping with boilerplate removal."""
+        from scrub.clean import TextNormalizer
+        normalizer = TextNormalizer(html_mode="parser", remove_boilerplate=True)
+        result = benchmark(normalizer.normalize, sample_html_text)
+        assert "Welcome to Data Harvester" in result
+
+    def test_cached_normalize_repeated(self, benchmark, sample_long_text):
+        """Benchmark memoized normalization of repeated content."""
+        from scrub.clean import CachedNormalizer
+        normalizer = CachedNormalizer()
+        normalizer.normalize(sample_long_text)
+        result = benchmark(normalizer.normalize, sample_long_text)
+        assert normalizer.stats()["hits"] > 0
+        assert isinstance(result, str)
+
+
+SCRUB_RULES = [
+    {"strip": r"<[^>\n]*>"},
+    {"strip": r"&[a-z]+;"},
+    {"strip": r"https?://\S+"},
+    {"strip": r"\[\d+\]"},
+    {"replace": r"\bInc\.", "with": "Inc"},
+    {"replace": r"\bLtd\.", "with": "Ltd"},
+    {"replace": r"\bCorp\.", "with": "Corp"},
+    {"collapse": r"\s"},
+    {"trim": True},
+    {"keep": r"\w\s.,!?\-"},
+]
+
+
+def apply_rules_separately(text):
+    """Reference: one re.sub per rule, in order."""
+    import re
+    for rule in SCRUB_RULES:
+        if "strip" in rule:
+            text = re.sub(rule["strip"], "", text)
+        elif "replace" in rule:
+            text = re.sub(rule["replace"], rule["with"], text)
+        elif "collapse" in rule:
+            text = re.sub(f"(?:{rule['collapse']})+", " ", text)
+        elif "trim" in rule:
+            text = text.strip()
+        else:
+            text = re.sub(f"[^{rule['keep']}]", "", text)
+    return text
+
+
+class TestScrubRuleBenchmarks:
+    """Compare per-rule regex passes against the compiled rule program."""
+
+    @pytest.mark.benchmark(group="scrub-rules")
+    def test_rules_separate_passes(self, benchmark, sample_html_text):
+        """Baseline: each rule as its own re.sub pass."""
+        result = benchmark(apply_rules_separately, sample_html_text)
+        assert isinstance(result, str)
+
+    @pytest.mark.benchmark(group="scrub-rules")
+    def test_rules_compiled_program(self, benchmark, sample_html_text):
+        """Benchmark the compiled rule program."""
+        from scrub.rules import compile_rules
+        program = compile_rules(SCRUB_RULES)
+        result = benchmark(program.apply, sample_html_text)
+        assert result == apply_rules_separately(sample_html_text)
+
+    @pytest.mark.benchmark(group="scrub-rules-default")
+    def test_default_rules_vs_fixed_path(self, benchmark, sample_long_text):
+        """The YAML default rule set should cost no more than normalize_text."""
+        from pathlib import Path
+        from scrub.clean import TextNormalizer, normalize_text
+        from scrub.rules import load_rules
+        rules_file = Path(__file__).parent.parent / "config" / "scrub_rules.yaml"
+        normalizer = TextNormalizer(rules=load_rules(rules_file))
+        result = benchmark(normalizer.normalize, sample_long_text)
+        assert result == normalize_text(sample_long_text)
+
+
+class TestDedupBenchmarks:
+    """Benchmarks for MinHash near-duplicate detection."""
+
+    def test_minhash_signature_long_text(self, benchmark, sample_long_text):
+        """Benchmark signing a long document."""
+        from scrub.dedup import MinHasher
+        hasher = MinHasher()
+        result = benchmark(hasher.signature, sample_long_text)
+        assert len(result) == hasher.num_perm
+
+    def test_dedup_seed_articles(self, benchmark, seed_articles):
+        """Benchmark streaming dedup over seed articles plus copies."""
+        if not seed_articles:
+            pytest.skip("Seed articles not available")
+        from scrub.dedup import dedup_documents
+
+        documents = [{"id": a["id"], "content": a["content"]} for a in seed_articles]
+
+        def dedup_all():
+            return list(dedup_documents(documents + documents))
+
+        result = benchmark(dedup_all)
+        assert len(result) == len(documents)
+
+
+class TestUnicodeBenchmarks:
+    """Benchmarks for the optional Unicode normalization step."""
+
+    @pytest.fixture
+    def unicode_normalizer(self):
+        from scrub.clean import TextNormalizer
+        return TextNormalizer(unicode_form="NFKC", strip_zero_width=True,
+                              fold_punctuation=True)
+
+    @pytest.mark.benchmark(group="unicode-ascii")
+    def test_unicode_step_ascii_fast_path(self, benchmark, unicode_normalizer, sample_long_text):
+        """Pure-ASCII input should skip Unicode work (near-zero cost)."""
+        result = benchmark(unicode_normalizer.normalize_unicode, sample_long_text)
+        assert result is sample_long_text
+
+    @pytest.mark.benchmark(group="unicode-ascii")
+    def test_unicode_step_forced_nfkc(self, benchmark, sample_long_text):
+        """Reference: unicodedata.normalize on the same ASCII text."""
+        import unicodedata
+        result = benchmark(unicodedata.normalize, "NFKC", sample_long_text)
+        assert result == sample_long_text
+
+    @pytest.mark.benchmark(group="unicode-normalize")
+    def test_normalize_with_unicode_ascii(self, benchmark, unicode_normalizer, sample_long_text):
+        """Full normalize with Unicode options on ASCII text."""
+        from scrub.clean import normalize_text
+        result = benchmark(unicode_normalizer.normalize, sample_long_text)
+        assert result == normalize_text(sample_long_text)
+
+    @pytest.mark.benchmark(group="unicode-normalize")
+    def test_normalize_with_unicode_non_ascii(self, benchmark, unicode_normalizer, sample_long_text):
+        """Full normalize with Unicode options on non-ASCII text."""
+        text = sample_long_text.replace("learning", "“learning”​ café")
+        result = benchmark(unicode_normalizer.normalize, text)
+        assert "​" not in result
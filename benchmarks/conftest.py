@@ -2,6 +2,7 @@
 import pytest
 import json
 from pathlib import Path
+from tests.helpers import make_pdf
 
 @pytest.fixture
 def sample_short_text():
@@ -71,9 +72,7 @@ def seed_articles():
             return json.load(f)
     return []
 
-@pytest.fixture
-def training_data():
-    """Sample training data for classification benchmarks."""
+def _training_data():
     texts = [
         "New smartphone release announced today",
         "Stock market reaches all-time high",
@@ -84,3 +83,40 @@ def training_data():
 
     labels = ["tech", "finance", "sports", "science", "food"] * 20
     return texts, labels
+
+@pytest.fixture
+def training_data():
+    """Sample training data for classification benchmarks."""
+    return _training_data()
+
+@pytest.fixture(scope="session")
+def training_data_session():
+    """The same training data, shared by session-, module- and class-scoped fixtures."""
+    return _training_data()
+
+
+@pytest.fixture(scope="session")
+def sample_pdf_files(tmp_path_factory):
+    """One long and several short generated PDFs for extraction benchmarks."""
+    root = tmp_path_factory.mktemp("pdfs")
+    paths = [str(root / "long.pdf")]
+    make_pdf(paths[0], 400)
+    for i in range(8):
+        paths.append(str(root / f"short_{i}.pdf"))
+        make_pdf(paths[-1], 25)
+    return paths
+
+
+@pytest.fixture(scope="session")
+def sample_report_pdf(tmp_path_factory):
+    """Generated report PDF with a running header and page-number footer."""
+    def line_text(page, line):
+        if line == 0:
+            return "Data Harvester Annual Report 2025"
+        if line == 39:
+            return f"Page {page + 1} of 100"
+        return f"Section {page}.{line}: revenue from region {line % 7} changed by {page + line}%"
+
+    path = str(tmp_path_factory.mktemp("reports") / "report.pdf")
+    make_pdf(path, 100, line_text=line_text)
+    return path
@@ -1,9 +1,15 @@
 """Document classification using scikit-learn"""
+from datetime import datetime, timezone
+from pathlib import Path
+import numpy as np
 from sklearn.feature_extraction.text import TfidfVectorizer
 from sklearn.naive_bayes import MultinomialNB
 from sklearn.pipeline import Pipeline
 import joblib
 from common.logger import log
+from common.parallel_processor import iter_chunks
+from classify.artifact import load_artifact, save_artifact
+from classify.streaming import StreamingTfidfTransformer, hashing_vectorizer, streaming_estimator
 
 class DocumentClassifier:
     """Classify documents into categories"""
@@ -11,13 +17,42 @@ class DocumentClassifier:
     def __init__(self):
         self.model = None
         self.is_trained = False
+        self.trained_at = None
 
-    def create_pipeline(self):
-        """Create classification pipeline"""
+    def create_pipeline(self, memory=None):
+        """
+        Create classification pipeline
+
+        Args:
+            memory: joblib.Memory or cache directory for fitted transformers,
+                so parameter searches reuse the TF-IDF fit across classifier
+                settings (None: no caching)
+        """
         return Pipeline([
             ('tfidf', TfidfVectorizer(max_features=5000, ngram_range=(1, 2))),
             ('classifier', MultinomialNB(alpha=0.1))
-        ])
+        ], memory=memory)
+
+    def create_streaming_pipeline(self, estimator='nb', tfidf=True, n_features=2 ** 20,
+                                  ngram_range=(1, 2)):
+        """
+        Create an out-of-core pipeline trainable with partial_train()
+
+        Hashing needs no vocabulary, so memory is bounded by n_features
+        rather than by the corpus.
+
+        Args:
+            estimator: 'nb' or 'sgd'
+            tfidf: Reweight hashed counts with incrementally updated idf
+            n_features: Hashed feature space size
+            ngram_range: Word n-gram range
+        """
+        steps = [('hashing', hashing_vectorizer(n_features, ngram_range,
+                                                norm=None if tfidf else 'l2'))]
+        if tfidf:
+            steps.append(('tfidf', StreamingTfidfTransformer()))
+        steps.append(('classifier', streaming_estimator(estimator)))
+        return Pipeline(steps)
 
     def train(self, texts, labels):
         """
@@ -32,9 +67,63 @@ class DocumentClassifier:
         self.model = self.create_pipeline()
         self.model.fit(texts, labels)
         self.is_trained = True
+        self.trained_at = datetime.now(timezone.utc).isoformat()
 
         log.info("Classifier training complete")
 
+    def partial_train(self, texts, labels, classes=None, **pipeline_options):
+        """
+        Fold one batch of labelled texts into a streaming model
+
+        The first call creates the pipeline from pipeline_options (see
+        create_streaming_pipeline) and needs the full label set in classes;
+        later calls, including after load_model(), update it in place.
+
+        Args:
+            texts: List of text documents
+            labels: List of corresponding labels
+            classes: Every label the model will ever see (first batch only)
+        """
+        if self.model is None:
+            if classes is None:
+                raise ValueError("classes is required for the first streaming batch")
+            self.model = self.create_streaming_pipeline(**pipeline_options)
+        elif 'hashing' not in self.model.named_steps:
+            raise ValueError("Model was not created for streaming training")
+
+        features = self.model.named_steps['hashing'].transform(texts)
+        tfidf = self.model.named_steps.get('tfidf')
+        if tfidf is not None:
+            features = tfidf.partial_fit(features).transform(features)
+
+        self.model[-1].partial_fit(features, labels, classes=classes)
+        self.is_trained = True
+        self.trained_at = datetime.now(timezone.utc).isoformat()
+
+    def train_stream(self, batches, classes, **pipeline_options):
+        """
+        Train out-of-core from an iterable of (texts, labels) batches
+
+        Only one batch is in memory at a time. Calling again on an
+        existing streaming model continues training it.
+
+        Args:
+            batches: Iterable of (texts, labels), e.g. labelled_batches()
+            classes: Every label the model will ever see
+            **pipeline_options: Passed to create_streaming_pipeline()
+
+        Returns:
+            int: Number of documents trained on
+        """
+        documents = 0
+        for number, (texts, labels) in enumerate(batches, 1):
+            self.partial_train(texts, labels, classes, **pipeline_options)
+            documents += len(texts)
+            log.debug(f"Streaming batch {number}: {documents} documents so far")
+
+        log.info(f"Streaming training complete: {documents} documents")
+        return documents
+
     def predict(self, texts):
         """Predict labels for texts"""
         if not self.is_trained:
@@ -49,6 +138,95 @@ class DocumentClassifier:
 
         return self.model.predict_proba(texts)
 
+    def transform(self, texts):
+        """Vectorize texts with the fitted pipeline, returning a CSR matrix"""
+        if not self.is_trained:
+            raise ValueError("Model must be trained before prediction")
+
+        return self.model[:-1].transform(texts).tocsr()
+
+    def predict_features(self, features, top_k=3):
+        """
+        Predict from an already vectorized matrix
+
+        Labels are taken from the probabilities, so one pass over the
+        estimator yields labels, probabilities and top-k classes.
+
+        Args:
+            features: Sparse matrix from transform()
+            top_k: Number of best classes to return per document (0: none)
+
+        Returns:
+            dict: labels, probabilities (n_docs x n_classes), and for
+                top_k > 0 top_labels and top_scores (n_docs x top_k, best first)
+        """
+        classifier = self.model[-1]
+        classes = classifier.classes_
+        probabilities = classifier.predict_proba(features)
+        result = {
+            'labels': classes[probabilities.argmax(axis=1)],
+            'probabilities': probabilities,
+        }
+
+        if top_k:
+            top_k = min(top_k, len(classes))
+            if top_k < len(classes):
+                top = np.argpartition(-probabilities, top_k - 1, axis=1)[:, :top_k]
+            else:
+                top = np.broadcast_to(np.arange(len(classes)), probabilities.shape)
+            scores = np.take_along_axis(probabilities, top, axis=1)
+            order = np.argsort(-scores, axis=1, kind='stable')
+            top = np.take_along_axis(top, order, axis=1)
+            result['top_labels'] = classes[top]
+            result['top_scores'] = np.take_along_axis(scores, order, axis=1)
+
+        return result
+
+    def iter_predict_batches(self, texts, chunk_size=10000, top_k=3):
+        """
+        Predict an iterable of texts in fixed-size chunks
+
+        Each chunk is vectorized once; only one chunk's matrix and results
+        are held at a time, so generators of any length can be scored.
+
+        Args:
+            texts: Iterable of text documents (lists or generators)
+            chunk_size: Documents vectorized per chunk
+            top_k: Number of best classes to return per document
+
+        Yields:
+            dict: predict_features() result for each chunk
+        """
+        if not self.is_trained:
+            raise ValueError("Model must be trained before prediction")
+
+        for chunk in iter_chunks(texts, chunk_size):
+            yield self.predict_features(self.transform(chunk), top_k)
+
+    def predict_batch(self, texts, chunk_size=10000, top_k=3):
+        """
+        Predict labels, probabilities and top-k classes for many texts
+
+        Args:
+            texts: Iterable of text documents (lists or generators)
+            chunk_size: Documents vectorized per chunk
+            top_k: Number of best classes to return per document
+
+        Returns:
+            dict: Per-chunk results of iter_predict_batches() concatenated
+        """
+        batches = list(self.iter_predict_batches(texts, chunk_size, top_k))
+        if batches:
+            return {key: np.concatenate([batch[key] for batch in batches]) for key in batches[0]}
+
+        classes = self.model[-1].classes_
+        result = {'labels': classes[:0], 'probabilities': np.zeros((0, len(classes)))}
+        if top_k:
+            top_k = min(top_k, len(classes))
+            result['top_labels'] = np.empty((0, top_k), dtype=classes.dtype)
+            result['top_scores'] = np.zeros((0, top_k))
+        return result
+
     def save_model(self, model_path):
         """Save trained model"""
         if not self.is_trained:
@@ -58,7 +236,40 @@ class DocumentClassifier:
         log.info(f"Model saved to {model_path}")
 
     def load_model(self, model_path):
-        """Load trained model"""
+        """Load trained model (a joblib file or an artifact directory)"""
+        if Path(model_path).is_dir():
+            self.load_artifact(model_path)
+            return
+
         self.model = joblib.load(model_path)
         self.is_trained = True
         log.info(f"Model loaded from {model_path}")
+
+    def save_artifact(self, model_dir):
+        """
+        Save trained model as a memory-mappable artifact directory
+
+        Args:
+            model_dir: Output directory
+
+        Returns:
+            dict: Artifact metadata (versions, labels, training date)
+        """
+        if not self.is_trained:
+            raise ValueError("No trained model to save")
+
+        return save_artifact(self.model, model_dir, self.trained_at)
+
+    def load_artifact(self, model_dir, mmap_mode='r', vocabulary='dict', strict_version=True):
+        """
+        Load a model artifact, sharing its arrays between processes
+
+        See classify.artifact.load_artifact for the arguments.
+
+        Returns:
+            dict: Artifact metadata
+        """
+        self.model, metadata = load_artifact(model_dir, mmap_mode, vocabulary, strict_version)
+        self.is_trained = True
+        self.trained_at = metadata.get('trained_at')
+        return metadata
@@ -0,0 +1,192 @@
+"""Micro-batching front end for serving a classifier to many callers"""
+import asyncio
+import queue
+import threading
+import time
+from collections import Counter, deque
+from concurrent.futures import Future
+import numpy as np
+from common.logger import log
+
+_STOP = object()
+
+
+class MicroBatcher:
+    """
+    Coalesce single-document requests into batched predictions
+
+    Callers on any thread submit one document and get a Future (or await
+    predict_async). A background thread collects requests until
+    max_batch_size are queued or the oldest has waited max_wait seconds,
+    classifies them with one vectorized predict call and resolves each
+    Future with its label. Request latencies and batch sizes are recorded
+    for tuning max_wait.
+    """
+
+    def __init__(self, classifier, max_batch_size=64, max_wait=0.005, latency_window=10000):
+        """
+        Initialize batcher and start its worker thread
+
+        Args:
+            classifier: Trained DocumentClassifier
+            max_batch_size: Requests classified per batch at most
+            max_wait: Seconds the oldest queued request may wait for a batch
+            latency_window: Most recent request latencies kept for percentiles
+        """
+        if not classifier.is_trained:
+            raise ValueError("Model must be trained before serving")
+
+        self.classifier = classifier
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+
+        self.requests = 0
+        self.batches = 0
+        self.failed_batches = 0
+        self.flush_reasons = Counter()
+        self.batch_sizes = Counter()
+        self.latencies = deque(maxlen=latency_window)
+
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name='micro-batcher', daemon=True)
+        self._thread.start()
+
+    def submit(self, text):
+        """
+        Queue one document for classification
+
+        Args:
+            text: Document text
+
+        Returns:
+            concurrent.futures.Future: Resolves to the predicted label
+        """
+        future = Future()
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("MicroBatcher is closed")
+            self._queue.put((text, future, time.perf_counter()))
+        return future
+
+    def predict(self, text, timeout=None):
+        """Classify one document, blocking until its batch has run"""
+        return self.submit(text).result(timeout)
+
+    async def predict_async(self, text):
+        """Classify one document from a coroutine"""
+        return await asyncio.wrap_future(self.submit(text))
+
+    def _collect(self, first):
+        """Gather a batch starting with first; returns (batch, reason, stop)"""
+        batch = [first]
+        deadline = first[2] + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                return batch, 'deadline', False
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                return batch, 'deadline', False
+            if item is _STOP:
+                return batch, 'close', True
+            batch.append(item)
+        return batch, 'size', False
+
+    def _run(self):
+        stop = False
+        while not stop:
+            item = self._queue.get()
+            if item is _STOP:
+                break
+            batch, reason, stop = self._collect(item)
+            self._classify(batch, reason)
+
+    def _classify(self, batch, reason):
+        """Run one prediction for batch and resolve its futures"""
+        batch = [item for item in batch if item[1].set_running_or_notify_cancel()]
+        if not batch:
+            return
+
+        try:
+            labels = self.classifier.predict([text for text, _, _ in batch])
+        except Exception as e:
+            log.error(f"Micro-batch of {len(batch)} failed: {e}")
+            with self._stats_lock:
+                self.failed_batches += 1
+            for _, future, _ in batch:
+                future.set_exception(e)
+        else:
+            for label, (_, future, _) in zip(labels.tolist(), batch):
+                future.set_result(label)
+
+        now = time.perf_counter()
+        with self._stats_lock:
+            self.latencies.extend(now - submitted for _, _, submitted in batch)
+            self.requests += len(batch)
+            self.batches += 1
+            self.batch_sizes[len(batch)] += 1
+            self.flush_reasons[reason] += 1
+
+    def stats(self, percentiles=(50, 90, 99)):
+        """
+        Serving statistics
+
+        Args:
+            percentiles: Latency percentiles to report
+
+        Returns:
+            dict: requests, batches, failed_batches, mean_batch_size,
+                latency_ms (percentile -> ms, plus max), batch_size_histogram
+                (size -> batches) and flush_reasons (size/deadline/close ->
+                batches)
+        """
+        with self._stats_lock:
+            latencies = np.array(self.latencies) * 1000
+            requests, batches = self.requests, self.batches
+            batch_sizes = dict(sorted(self.batch_sizes.items()))
+            flush_reasons = dict(self.flush_reasons)
+
+        latency_ms = {}
+        if len(latencies):
+            for percentile, value in zip(percentiles, np.percentile(latencies, percentiles)):
+                latency_ms[f"p{percentile}"] = float(value)
+            latency_ms['max'] = float(latencies.max())
+
+        return {
+            'requests': requests,
+            'batches': batches,
+            'failed_batches': self.failed_batches,
+            'mean_batch_size': requests / batches if batches else 0.0,
+            'latency_ms': latency_ms,
+            'batch_size_histogram': batch_sizes,
+            'flush_reasons': flush_reasons,
+        }
+
+    def close(self, wait=True):
+        """
+        Stop accepting requests; queued requests are still classified
+
+        Args:
+            wait: Block until the worker thread has finished
+        """
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._queue.put(_STOP)
+
+        if wait:
+            self._thread.join()
+            stats = self.stats()
+            log.info(f"Micro-batcher closed: {stats['requests']} requests in "
+                     f"{stats['batches']} batches (mean {stats['mean_batch_size']:.1f})")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
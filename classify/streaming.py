@@ -0,0 +1,83 @@
+"""Out-of-core training helpers: incremental TF-IDF and labelled batch streams"""
+import numpy as np
+import scipy.sparse as sp
+from sklearn.feature_extraction.text import HashingVectorizer, TfidfTransformer
+from sklearn.linear_model import SGDClassifier
+from sklearn.naive_bayes import MultinomialNB
+from common.parallel_processor import iter_chunks
+
+
+class StreamingTfidfTransformer(TfidfTransformer):
+    """
+    TfidfTransformer whose idf weights can be updated batch by batch
+
+    Document frequencies and the document count are accumulated across
+    partial_fit() calls, and idf_ is recomputed from the running totals
+    with the same smoothing as TfidfTransformer.fit(). Batches seen early
+    are therefore weighted with the idf known at the time.
+    """
+
+    def partial_fit(self, X, y=None):
+        """Add the document frequencies of count matrix X"""
+        X = sp.csr_matrix(X)
+        if not hasattr(self, 'doc_freq_'):
+            self.doc_freq_ = np.zeros(X.shape[1], dtype=np.int64)
+            self.n_samples_seen_ = 0
+            self.n_features_in_ = X.shape[1]
+
+        X.eliminate_zeros()
+        self.doc_freq_ += np.bincount(X.indices, minlength=X.shape[1])
+        self.n_samples_seen_ += X.shape[0]
+
+        if self.use_idf:
+            smooth = int(self.smooth_idf)
+            self.idf_ = np.log((self.n_samples_seen_ + smooth)
+                               / (self.doc_freq_ + smooth).astype(np.float64)) + 1.0
+        return self
+
+
+def streaming_estimator(name):
+    """
+    Create a partial_fit-capable classifier
+
+    Args:
+        name: 'nb' (MultinomialNB) or 'sgd' (logistic-loss SGDClassifier,
+            so probabilities are available)
+
+    Returns:
+        Unfitted estimator
+    """
+    if name == 'nb':
+        return MultinomialNB(alpha=0.1)
+    if name == 'sgd':
+        return SGDClassifier(loss='log_loss', alpha=1e-5, random_state=42)
+    raise ValueError(f"Unknown streaming estimator: {name} (choose 'nb' or 'sgd')")
+
+
+def hashing_vectorizer(n_features=2 ** 20, ngram_range=(1, 2), norm='l2'):
+    """Stateless vectorizer with non-negative features (required by MultinomialNB)"""
+    return HashingVectorizer(n_features=n_features, ngram_range=ngram_range,
+                             alternate_sign=False, norm=norm)
+
+
+def labelled_batches(records, text_key='content', label_key='category', batch_size=10000):
+    """
+    Group labelled records into training batches
+
+    Records missing text or label are skipped.
+
+    Args:
+        records: Iterable of dicts, e.g. DataAggregator.iter_json_records()
+        text_key: Record key holding the document text
+        label_key: Record key holding the label
+        batch_size: Documents per batch
+
+    Yields:
+        tuple: (texts, labels) lists of up to batch_size items
+    """
+    pairs = ((record.get(text_key), record.get(label_key)) for record in records
+             if isinstance(record, dict))
+    pairs = ((text, label) for text, label in pairs if text and label is not None)
+    for chunk in iter_chunks(pairs, batch_size):
+        texts, labels = zip(*chunk)
+        yield list(texts), list(labels)
@@ -1,9 +1,32 @@
 """Training pipeline for classification models"""
-from sklearn.model_selection import train_test_split, cross_val_score
+import shutil
+import tempfile
+import time
+from datetime import datetime, timezone
+from scipy.stats import loguniform
+from sklearn.experimental import enable_halving_search_cv  # noqa: F401
+from sklearn.model_selection import (GridSearchCV, HalvingGridSearchCV, HalvingRandomSearchCV,
+                                     RandomizedSearchCV, train_test_split, cross_val_score)
 from sklearn.metrics import classification_report, confusion_matrix
 from common.logger import log
 from classify.classify import DocumentClassifier
 
+# Searched when no grid is given; the TF-IDF fit is shared across alpha values
+DEFAULT_PARAM_GRID = {
+    'tfidf__max_features': [5000, 20000, None],
+    'tfidf__ngram_range': [(1, 1), (1, 2)],
+    'classifier__alpha': [0.01, 0.1, 1.0],
+}
+
+DEFAULT_PARAM_DISTRIBUTIONS = {
+    'tfidf__max_features': [2000, 5000, 10000, 20000, 50000, None],
+    'tfidf__ngram_range': [(1, 1), (1, 2), (1, 3)],
+    'classifier__alpha': loguniform(1e-3, 1.0),
+}
+
+SEARCH_METHODS = ('grid', 'random', 'halving', 'halving_random')
+
+
 class TrainingPipeline:
     """Pipeline for training and evaluating classifiers"""
 
@@ -37,8 +60,7 @@ class TrainingPipeline:
 
         y_pred = self.classifier.predict(self.X_test)
 
-        log.info("
-Classification Report:")
+        log.info("\nClassification Report:")
         log.info(classification_report(self.y_test, y_pred))
 
         return {
@@ -46,17 +68,126 @@ Classification Report:")
             'actual': self.y_test
         }
 
-    def cross_validate(self, cv=5):
-        """Perform cross-validation"""
+    def cross_validate(self, cv=5, n_jobs=None):
+        """
+        Perform cross-validation
+
+        Args:
+            cv: Number of folds
+            n_jobs: Folds fitted in parallel (None: 1, -1: all cores)
+        """
         if self.X_train is None:
             raise ValueError("Data not loaded")
 
         pipeline = self.classifier.create_pipeline()
-        scores = cross_val_score(pipeline, self.X_train, self.y_train, cv=cv)
+        scores = cross_val_score(pipeline, self.X_train, self.y_train, cv=cv, n_jobs=n_jobs)
 
         log.info(f"Cross-validation scores: {scores}")
         log.info(f"Mean accuracy: {scores.mean():.3f} (+/- {scores.std() * 2:.3f})")
 
         return scores
 
+    def search(self, params=None, method='grid', cv=5, n_jobs=-1, n_iter=20,
+               scoring='accuracy', cache_dir=None, refit=True, random_state=42):
+        """
+        Tune pipeline parameters with cross-validated search
+
+        Candidates and folds are fitted in parallel. The pipeline caches
+        fitted TF-IDF transforms per fold and vectorizer setting, so
+        candidates that differ only in classifier parameters skip
+        re-vectorizing.
+
+        Args:
+            params: Grid (grid/halving) or distributions (random/halving_random)
+                keyed by pipeline parameter, e.g. 'classifier__alpha'
+                (default: DEFAULT_PARAM_GRID / DEFAULT_PARAM_DISTRIBUTIONS)
+            method: One of SEARCH_METHODS
+            cv: Number of folds
+            n_jobs: Parallel fits (-1: all cores)
+            n_iter: Candidates sampled by 'random'
+            scoring: sklearn scoring name
+            cache_dir: Transformer cache directory, kept for reuse across
+                runs (None: a temporary directory removed afterwards)
+            refit: Refit the best candidate on the training split and use
+                it as the classifier
+            random_state: Seed for sampled and halving searches
+
+        Returns:
+            dict: best_params, best_score, seconds and per-candidate results
+                (params, mean_score, std_score, mean_fit_time,
+                mean_score_time, rank), best first
+        """
+        if self.X_train is None:
+            raise ValueError("Data not loaded")
+        if method not in SEARCH_METHODS:
+            raise ValueError(f"Unknown search method: {method} (choose from {SEARCH_METHODS})")
+
+        sampled = method in ('random', 'halving_random')
+        if params is None:
+            params = DEFAULT_PARAM_DISTRIBUTIONS if sampled else DEFAULT_PARAM_GRID
+
+        memory = cache_dir or tempfile.mkdtemp(prefix='classify-search-')
+        pipeline = self.classifier.create_pipeline(memory=memory)
+        options = {'cv': cv, 'n_jobs': n_jobs, 'scoring': scoring, 'refit': refit}
+
+        if method == 'grid':
+            search = GridSearchCV(pipeline, params, **options)
+        elif method == 'random':
+            search = RandomizedSearchCV(pipeline, params, n_iter=n_iter,
+                                        random_state=random_state, **options)
+        elif method == 'halving':
+            search = HalvingGridSearchCV(pipeline, params, random_state=random_state, **options)
+        else:
+            search = HalvingRandomSearchCV(pipeline, params, random_state=random_state, **options)
+
+        start = time.perf_counter()
+        try:
+            search.fit(self.X_train, self.y_train)
+        finally:
+            if cache_dir is None:
+                shutil.rmtree(memory, ignore_errors=True)
+        seconds = time.perf_counter() - start
+
+        results = search_results(search.cv_results_)
+        log.info(f"{method} search: {len(results)} candidates x {cv} folds in {seconds:.1f}s")
+        for result in results[:5]:
+            log.info(f"  #{result['rank']} {result['mean_score']:.3f} "
+                     f"(+/- {result['std_score'] * 2:.3f}), "
+                     f"{result['mean_fit_time']:.2f}s/fit: {result['params']}")
+
+        if refit:
+            self.classifier.model = search.best_estimator_.set_params(memory=None)
+            self.classifier.is_trained = True
+            self.classifier.trained_at = datetime.now(timezone.utc).isoformat()
+
+        return {
+            'best_params': search.best_params_,
+            'best_score': search.best_score_,
+            'seconds': seconds,
+            'results': results,
+        }
+
+
+def search_results(cv_results):
+    """
+    Flatten sklearn cv_results_ into per-candidate dicts, best first
+
+    Halving searches evaluate candidates in several rounds; only each
+    candidate's last (largest-resource) round is kept.
+    """
+    latest = {}
+    for i, params in enumerate(cv_results['params']):
+        latest[repr(sorted(params.items()))] = i
+
+    results = [{
+        'params': cv_results['params'][i],
+        'mean_score': float(cv_results['mean_test_score'][i]),
+        'std_score': float(cv_results['std_test_score'][i]),
+        'mean_fit_time': float(cv_results['mean_fit_time'][i]),
+        'mean_score_time': float(cv_results['mean_score_time'][i]),
+        'rank': int(cv_results['rank_test_score'][i]),
+    } for i in sorted(latest.values())]
+
+    return sorted(results, key=lambda result: result['rank'])
+
 # Added validation for empty datasets
@@ -1,6 +1,24 @@
+from collections import deque
+from itertools import islice
 from multiprocessing import Pool, cpu_count
 from common.logger import log
 
+
+def _map_chunk(func, chunk):
+    """Apply func to every item of a chunk (runs inside a worker)"""
+    return [func(item) for item in chunk]
+
+
+def iter_chunks(items, chunk_size):
+    """Yield successive lists of up to chunk_size items from any iterable"""
+    iterator = iter(items)
+    while True:
+        chunk = list(islice(iterator, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+
 class ParallelProcessor:
     def __init__(self, num_workers=None):
         self.num_workers = num_workers or cpu_count()
@@ -11,4 +29,40 @@ class ParallelProcessor:
         log.info(f"Processed {len(items)} items with {self.num_workers} workers")
         return results
 
+    def process_stream(self, func, items, chunk_size=1000, max_pending=None,
+                       initializer=None, initargs=()):
+        """
+        Lazily apply func to items in ordered chunks
+
+        Unlike Pool.imap, the input is only consumed as results are
+        drained, so at most max_pending chunks are held in memory.
+
+        Args:
+            func: Picklable callable applied to each item
+            items: Any iterable, including generators
+            chunk_size: Items sent to a worker per task
+            max_pending: Chunks in flight (default: 2 per worker)
+            initializer: Called with initargs once in each worker, e.g. to
+                build state that should outlive a single chunk
+
+        Yields:
+            Results in input order
+        """
+        chunks = iter_chunks(items, chunk_size)
+
+        if self.num_workers <= 1:
+            for chunk in chunks:
+                yield from _map_chunk(func, chunk)
+            return
+
+        max_pending = max_pending or self.num_workers * 2
+        with Pool(self.num_workers, initializer, initargs) as pool:
+            pending = deque()
+            for chunk in chunks:
+                pending.append(pool.apply_async(_map_chunk, (func, chunk)))
+                if len(pending) >= max_pending:
+                    yield from pending.popleft().get()
+            while pending:
+                yield from pending.popleft().get()
+
 # Optimized chunk size for large files
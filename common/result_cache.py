@@ -0,0 +1,345 @@
+"""Content-addressed result caching with an in-memory LRU and optional disk store"""
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from common.logger import log
+
+
+def content_hash(data, digest_size=16):
+    """
+    Fast content hash for cache keys
+
+    Args:
+        data: str or bytes
+        digest_size: blake2b digest size in bytes
+
+    Returns:
+        str: Hex digest
+    """
+    if isinstance(data, str):
+        data = data.encode('utf-8', errors='surrogatepass')
+    return hashlib.blake2b(data, digest_size=digest_size).hexdigest()
+
+
+def encode_text(value):
+    """Default ResultCache encoder for str values"""
+    return value.encode('utf-8', errors='surrogatepass')
+
+
+def decode_text(data):
+    """Default ResultCache decoder for str values"""
+    return bytes(data).decode('utf-8', errors='surrogatepass')
+
+
+class LRUCache:
+    """Thread-safe LRU bounded by entry count and total value size"""
+
+    def __init__(self, max_entries=10000, max_bytes=64 * 1024 * 1024, sizeof=len):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.sizeof = sizeof
+        self.current_bytes = 0
+        self.evictions = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._data)
+
+    def __getstate__(self):
+        # Ship configuration, not contents, to worker processes
+        state = self.__dict__.copy()
+        state['_data'] = OrderedDict()
+        state['current_bytes'] = 0
+        del state['_lock']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            if key not in self._data:
+                return default
+            self._data.move_to_end(key)
+            return self._data[key][0]
+
+    def set(self, key, value):
+        size = self.sizeof(value)
+        if size > self.max_bytes:
+            return
+
+        with self._lock:
+            if key in self._data:
+                self.current_bytes -= self._data.pop(key)[1]
+            self._data[key] = (value, size)
+            self.current_bytes += size
+
+            while (len(self._data) > self.max_entries
+                   or self.current_bytes > self.max_bytes):
+                _, (_, evicted_size) = self._data.popitem(last=False)
+                self.current_bytes -= evicted_size
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.current_bytes = 0
+
+
+class DiskStore:
+    """
+    Size-bounded key/value store sharded over SQLite files
+
+    Keys are spread over num_shards databases by their first hex digits so
+    concurrent worker processes rarely contend for the same file. Each
+    shard keeps its total size in a row updated in the same transaction
+    as every write, so the limit holds across processes sharing the
+    directory; when a shard exceeds its share of max_bytes, least recently
+    used rows are deleted. Read recency is buffered and written in batches, so lookups
+    do not commit.
+    """
+
+    def __init__(self, directory, num_shards=8, max_bytes=1024 * 1024 * 1024,
+                 touch_batch=1000):
+        self.directory = directory
+        self.num_shards = num_shards
+        self.max_bytes = max_bytes
+        self.touch_batch = touch_batch
+        self.evictions = 0
+        self._connections = {}
+        self._touched = {}
+        self._lock = threading.RLock()
+        os.makedirs(directory, exist_ok=True)
+
+    def __getstate__(self):
+        # Connections cannot cross process boundaries; reopen lazily
+        state = self.__dict__.copy()
+        state['_connections'] = {}
+        state['_touched'] = {}
+        del state['_lock']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.RLock()
+
+    def _shard(self, key):
+        return int(key[:8], 16) % self.num_shards
+
+    def _connect(self, shard):
+        conn = self._connections.get(shard)
+        if conn is None:
+            path = os.path.join(self.directory, f"shard_{shard:02d}.sqlite")
+            conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS cache ("
+                "key TEXT PRIMARY KEY, value BLOB, size INTEGER, accessed REAL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS cache_accessed ON cache (accessed)")
+            conn.execute("CREATE TABLE IF NOT EXISTS usage (id INTEGER PRIMARY KEY, total INTEGER)")
+            conn.execute("INSERT OR IGNORE INTO usage (id, total) "
+                         "SELECT 0, COALESCE(SUM(size), 0) FROM cache")
+            conn.commit()
+            self._connections[shard] = conn
+        return conn
+
+    def get(self, key):
+        shard = self._shard(key)
+        with self._lock:
+            conn = self._connect(shard)
+            row = conn.execute("SELECT value FROM cache WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+
+            touched = self._touched.setdefault(shard, {})
+            touched[key] = time.time()
+            if len(touched) >= self.touch_batch:
+                self._flush_touched(shard)
+                conn.commit()
+            return row[0]
+
+    def _flush_touched(self, shard):
+        """Write buffered access times of a shard (caller commits)"""
+        touched = self._touched.pop(shard, None)
+        if touched:
+            self._connections[shard].executemany(
+                "UPDATE cache SET accessed = ? WHERE key = ?",
+                [(accessed, key) for key, accessed in touched.items()])
+
+    def set(self, key, value):
+        shard = self._shard(key)
+        with self._lock:
+            conn = self._connect(shard)
+            if conn.in_transaction:
+                conn.commit()
+            # Take the write lock first so the size total cannot change under us
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                old = conn.execute("SELECT size FROM cache WHERE key = ?", (key,)).fetchone()
+                conn.execute(
+                    "INSERT OR REPLACE INTO cache (key, value, size, accessed) VALUES (?, ?, ?, ?)",
+                    (key, value, len(value), time.time())
+                )
+                conn.execute("UPDATE usage SET total = total + ? WHERE id = 0",
+                             (len(value) - (old[0] if old else 0),))
+                total = conn.execute("SELECT total FROM usage WHERE id = 0").fetchone()[0]
+
+                if total > self.max_bytes // self.num_shards:
+                    # Eviction order must see recent reads
+                    self._flush_touched(shard)
+                    self._evict(conn, total)
+                conn.commit()
+            except BaseException:
+                conn.rollback()
+                raise
+
+    def _evict(self, conn, total):
+        # Trim to 90% of the shard budget so eviction is not run on every insert
+        target = int(self.max_bytes // self.num_shards * 0.9)
+        rows = conn.execute("SELECT key, size FROM cache ORDER BY accessed").fetchall()
+        doomed = []
+        freed = 0
+        for key, size in rows:
+            if total - freed <= target:
+                break
+            doomed.append((key,))
+            freed += size
+        conn.executemany("DELETE FROM cache WHERE key = ?", doomed)
+        conn.execute("UPDATE usage SET total = total - ? WHERE id = 0", (freed,))
+        self.evictions += len(doomed)
+
+    def flush(self):
+        """Write buffered access times"""
+        with self._lock:
+            for shard in list(self._touched):
+                self._flush_touched(shard)
+                self._connections[shard].commit()
+
+    def close(self):
+        with self._lock:
+            self.flush()
+            for conn in self._connections.values():
+                conn.close()
+            self._connections = {}
+
+
+class ResultCache:
+    """
+    Two-level result cache: in-memory LRU in front of an optional DiskStore
+
+    Values are kept as-is in memory and passed through encode/decode
+    (bytes) on their way to and from disk.
+    """
+
+    def __init__(self, max_entries=10000, max_bytes=64 * 1024 * 1024,
+                 disk_path=None, disk_max_bytes=1024 * 1024 * 1024,
+                 num_shards=8, encode=None, decode=None, sizeof=len):
+        """
+        Initialize cache
+
+        Args:
+            max_entries: In-memory entry limit
+            max_bytes: In-memory size limit (as measured by sizeof)
+            disk_path: Directory for the on-disk store (None disables it)
+            disk_max_bytes: On-disk size limit
+            num_shards: Number of SQLite shard files
+            encode: Value -> bytes for the disk store (default: utf-8 str)
+            decode: bytes -> value for the disk store (default: utf-8 str)
+            sizeof: Value size function for the in-memory limit
+        """
+        self.memory = LRUCache(max_entries, max_bytes, sizeof)
+        self.disk = DiskStore(disk_path, num_shards, disk_max_bytes) if disk_path else None
+        self.encode = encode or encode_text
+        self.decode = decode or decode_text
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state['_lock']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Look up key in memory, then on disk; None on miss"""
+        value = self.memory.get(key)
+        if value is not None:
+            self.add_counts(hits=1)
+            return value
+
+        if self.disk is not None:
+            data = self.disk.get(key)
+            if data is not None:
+                value = self.decode(data)
+                self.memory.set(key, value)
+                self.add_counts(hits=1, disk_hits=1)
+                return value
+
+        self.add_counts(misses=1)
+        return None
+
+    def add_counts(self, hits=0, disk_hits=0, misses=0):
+        """Add to the hit/miss counters, e.g. counts reported by worker processes"""
+        with self._lock:
+            self.hits += hits
+            self.disk_hits += disk_hits
+            self.misses += misses
+
+    def counts(self):
+        """Return (hits, disk_hits, misses)"""
+        with self._lock:
+            return self.hits, self.disk_hits, self.misses
+
+    def set(self, key, value):
+        """Store value in memory and, if enabled, on disk"""
+        self.memory.set(key, value)
+        if self.disk is not None:
+            self.disk.set(key, self.encode(value))
+
+    def get_or_compute(self, key, func, *args):
+        """Return the cached value for key, computing and storing it on a miss"""
+        value = self.get(key)
+        if value is None:
+            value = func(*args)
+            self.set(key, value)
+        return value
+
+    @property
+    def hit_rate(self):
+        hits, _, misses = self.counts()
+        lookups = hits + misses
+        return hits / lookups if lookups else 0.0
+
+    def stats(self):
+        """Return cache counters"""
+        hits, disk_hits, misses = self.counts()
+        return {
+            'hits': hits,
+            'disk_hits': disk_hits,
+            'misses': misses,
+            'hit_rate': hits / (hits + misses) if hits + misses else 0.0,
+            'entries': len(self.memory),
+            'memory_bytes': self.memory.current_bytes,
+            'evictions': self.memory.evictions,
+            'disk_evictions': self.disk.evictions if self.disk is not None else 0,
+        }
+
+    def log_stats(self, name='cache'):
+        stats = self.stats()
+        log.info(f"{name}: {stats['hits']} hits ({stats['disk_hits']} from disk), "
+                 f"{stats['misses']} misses, hit rate {stats['hit_rate']:.1%}")
+
+    def close(self):
+        if self.disk is not None:
+            self.disk.close()
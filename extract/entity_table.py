@@ -0,0 +1,101 @@
+"""Columnar entity tables built without per-entity objects"""
+from array import array
+import numpy as np
+import pandas as pd
+
+COLUMNS = ('doc_id', 'start', 'end', 'label', 'text')
+
+
+class EntityTable:
+    """
+    Append-only columnar store of entity spans
+
+    Offsets live in typed arrays and labels are stored as integer codes
+    into a label list, so a table of millions of entities costs a few
+    machine words per row plus the entity strings.
+    """
+
+    def __init__(self):
+        self.doc_ids = []
+        self.starts = array('q')
+        self.ends = array('q')
+        self.label_codes = array('i')
+        self.labels = []
+        self.texts = []
+        self._label_index = {}
+
+    def __len__(self):
+        return len(self.starts)
+
+    def _code(self, label):
+        code = self._label_index.get(label)
+        if code is None:
+            code = self._label_index[label] = len(self.labels)
+            self.labels.append(label)
+        return code
+
+    def add_doc(self, doc_id, doc, offset=0):
+        """Append the entities of a spaCy Doc"""
+        for ent in doc.ents:
+            self.doc_ids.append(doc_id)
+            self.starts.append(offset + ent.start_char)
+            self.ends.append(offset + ent.end_char)
+            self.label_codes.append(self._code(ent.label_))
+            self.texts.append(ent.text)
+
+    def add_spans(self, doc_id, spans):
+        """Append (start, end, label, text) spans"""
+        for start, end, label, text in spans:
+            self.doc_ids.append(doc_id)
+            self.starts.append(start)
+            self.ends.append(end)
+            self.label_codes.append(self._code(label))
+            self.texts.append(text)
+
+    def to_numpy(self):
+        """
+        Return columns as NumPy arrays
+
+        Returns:
+            dict: Column name -> array; label holds codes into 'labels'
+        """
+        return {
+            'doc_id': np.array(self.doc_ids),
+            'start': np.frombuffer(self.starts, dtype=np.int64).copy(),
+            'end': np.frombuffer(self.ends, dtype=np.int64).copy(),
+            'label': np.frombuffer(self.label_codes, dtype=np.int32).copy(),
+            'labels': np.array(self.labels, dtype=object),
+            'text': np.array(self.texts, dtype=object),
+        }
+
+    def to_pandas(self):
+        """Return a DataFrame with a categorical label column"""
+        columns = self.to_numpy()
+        return pd.DataFrame({
+            'doc_id': columns['doc_id'],
+            'start': columns['start'],
+            'end': columns['end'],
+            'label': pd.Categorical.from_codes(columns['label'], categories=self.labels),
+            'text': columns['text'],
+        }, columns=list(COLUMNS))
+
+    def to_arrow(self):
+        """Return a pyarrow Table with a dictionary-encoded label column"""
+        import pyarrow as pa
+
+        columns = self.to_numpy()
+        return pa.table({
+            'doc_id': pa.array(self.doc_ids),
+            'start': pa.array(columns['start']),
+            'end': pa.array(columns['end']),
+            'label': pa.DictionaryArray.from_arrays(
+                pa.array(columns['label']), pa.array(self.labels, type=pa.string())),
+            'text': pa.array(self.texts, type=pa.string()),
+        })
+
+    def to(self, output):
+        """Convert to 'pandas', 'arrow' or 'numpy'"""
+        converters = {'pandas': self.to_pandas, 'arrow': self.to_arrow, 'numpy': self.to_numpy}
+        if output not in converters:
+            raise ValueError(f"Unknown entity table output: {output}")
+        return converters[output]()
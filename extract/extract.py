@@ -1,25 +1,215 @@
 """Named Entity Recognition using spaCy"""
+import json
+from pathlib import Path
 import spacy
 from common.logger import log
+from common.parallel_processor import iter_chunks
+from common.result_cache import ResultCache, content_hash
+from extract.entity_table import EntityTable
+from extract.gazetteer import add_gazetteer, gazetteer_fingerprint, gazetteer_pipeline, load_gazetteer
+
+# Components that never affect doc.ents
+NON_NER_COMPONENTS = [
+    'tagger', 'parser', 'attribute_ruler', 'lemmatizer', 'senter',
+    'morphologizer', 'trainable_lemmatizer', 'textcat', 'textcat_multilabel',
+]
+
+# Shared embedding components, only needed while something listens to them
+EMBEDDING_COMPONENTS = ('tok2vec', 'transformer')
+
 
 class EntityExtractor:
     """Extract named entities from text"""
 
-    def __init__(self, model_name='en_core_web_sm'):
+    def __init__(self, model_name='en_core_web_sm', prune=False, lazy=False, cache=None,
+                 shard_size=None, shard_overlap=200, gazetteer=None, statistical=True,
+                 phrase_attr='ORTH'):
         """
         Initialize entity extractor
 
         Args:
             model_name: spaCy model name
+            prune: Load only the components NER needs
+            lazy: Defer loading the model until first use
+            cache: Optional ResultCache (see entity_cache) so unchanged
+                texts skip spaCy
+            shard_size: Texts longer than this many characters are split at
+                paragraph/sentence boundaries and parsed shard by shard, e.g.
+                100000 (None: parse every text whole)
+            shard_overlap: Characters shared by neighbouring shards so
+                entities on a cut are seen whole (less than half of
+                shard_size, or shards would re-parse most of the text)
+            gazetteer: Gazetteer file or list of EntityRuler patterns whose
+                entities are matched by rule before the statistical NER
+            statistical: Run the spaCy model; when False only the gazetteer
+                runs, on a blank tokenizer-only pipeline for the model's
+                language
+            phrase_attr: Token attribute gazetteer phrases match on
+                ('ORTH' or 'LOWER' for case-insensitive matching)
         """
+        self.model_name = model_name
+        self.prune = prune
+        self.cache = cache
+        self.shard_size = shard_size
+        self.shard_overlap = shard_overlap
+        self.statistical = statistical
+        self.phrase_attr = phrase_attr
+        if isinstance(gazetteer, (str, Path)):
+            gazetteer = load_gazetteer(gazetteer)
+        self.gazetteer = gazetteer
+        if not statistical and not gazetteer:
+            raise ValueError("statistical=False requires a gazetteer")
+        if shard_size is not None:
+            _check_shard_overlap(shard_size, shard_overlap)
+        self._nlp = None
+        self._cache_namespace = None
+
+        if not lazy:
+            self._nlp = self._load()
+
+    @property
+    def nlp(self):
+        """spaCy pipeline, loaded on first access when lazy"""
+        if self._nlp is None:
+            self._nlp = self._load()
+        return self._nlp
+
+    def _load(self):
+        if not self.statistical:
+            nlp = gazetteer_pipeline(self.gazetteer, self.lang, self.phrase_attr)
+            log.info(f"Loaded gazetteer pipeline ({len(self.gazetteer)} patterns, lang: {self.lang})")
+            return nlp
+
         try:
-            self.nlp = spacy.load(model_name)
-            log.info(f"Loaded spaCy model: {model_name}")
+            if self.prune:
+                nlp = spacy.load(self.model_name, exclude=NON_NER_COMPONENTS)
+                self._disable_unused_embeddings(nlp)
+            else:
+                nlp = spacy.load(self.model_name)
+            if self.gazetteer:
+                add_gazetteer(nlp, self.gazetteer, self.phrase_attr)
+            log.info(f"Loaded spaCy model: {self.model_name} (pipeline: {nlp.pipe_names})")
+            return nlp
         except OSError:
-            log.error(f"spaCy model not found: {model_name}")
+            log.error(f"spaCy model not found: {self.model_name}")
             log.info("Run: python -m spacy download en_core_web_sm")
             raise
 
+    @property
+    def lang(self):
+        """Language code of the model, e.g. 'en' for en_core_web_sm"""
+        if self._nlp is not None:
+            return self._nlp.lang
+        return Path(self.model_name).name.split('_')[0]
+
+    @staticmethod
+    def _disable_unused_embeddings(nlp):
+        """Disable tok2vec/transformer when NER has its own embedding layer"""
+        for name in EMBEDDING_COMPONENTS:
+            if name not in nlp.pipe_names:
+                continue
+            listeners = getattr(nlp.get_pipe(name), 'listening_components', None)
+            if listeners is not None and not listeners:
+                nlp.disable_pipe(name)
+
+    @property
+    def cache_namespace(self):
+        """
+        Model identity folded into every cache key
+
+        Includes the model version, so upgrading the model invalidates
+        old entries; they are never read again and age out of the cache.
+        """
+        if self._cache_namespace is None:
+            if self.statistical:
+                pipeline = 'ner-only' if self.prune else 'full'
+                model = f"{self.model_name}:{self._model_version()}"
+            else:
+                pipeline = 'gazetteer-only'
+                model = f"blank-{self.lang}"
+            if self.gazetteer:
+                pipeline += f":{gazetteer_fingerprint(self.gazetteer, self.phrase_attr)}"
+            self._cache_namespace = (f"{model}:spacy-{spacy.__version__}:{pipeline}:"
+                                     f"{self.shard_size}:{self.shard_overlap}")
+        return self._cache_namespace
+
+    def _model_version(self):
+        # Avoid loading the pipeline just to learn its version
+        if self._nlp is not None:
+            return self._nlp.meta.get('version')
+
+        version = spacy.util.get_package_version(self.model_name)
+        if version is None and Path(self.model_name).exists():
+            version = spacy.util.get_model_meta(self.model_name).get('version')
+        if version is None:
+            version = self.nlp.meta.get('version')
+        return version
+
+    def _cache_key(self, text):
+        return content_hash(f"{self.cache_namespace}\0{text}")
+
+    def _needs_sharding(self, text):
+        return self.shard_size is not None and len(text) > self.shard_size
+
+    def _parse(self, text):
+        """Entity list for one text, sharding it when it is long"""
+        if self._needs_sharding(text):
+            for _, entities in self._iter_parsed([(text, None)]):
+                return entities
+        return entities_from_doc(self.nlp(text))[0]
+
+    def _iter_docs(self, pairs, batch_size=256, n_process=1):
+        """
+        Yield (context, doc, offset, is_last, whole) for (text, context) pairs
+
+        Long texts are split into shards that go through nlp.pipe like any
+        other text; since pipe preserves order, a text's shards arrive
+        together, so callers can merge them as soon as is_last is seen and
+        only one shard per text needs to be in memory at a time. whole is
+        set when doc covers the entire text.
+        """
+        if self.shard_size is None:
+            for doc, context in self.nlp.pipe(pairs, as_tuples=True,
+                                              batch_size=batch_size, n_process=n_process):
+                yield context, doc, 0, True, True
+            return
+
+        def shards():
+            for text, context in pairs:
+                bounds = shard_bounds(text, self.shard_size, self.shard_overlap)
+                last = len(bounds) - 1
+                for number, (start, end) in enumerate(bounds):
+                    yield text[start:end], (context, start, number == last, last == 0)
+
+        for doc, (context, offset, is_last, whole) in self.nlp.pipe(
+                shards(), as_tuples=True, batch_size=batch_size, n_process=n_process):
+            yield context, doc, offset, is_last, whole
+
+    def _iter_parsed(self, pairs, batch_size=256, n_process=1):
+        """Yield (context, entities) for (text, context) pairs"""
+        spans = []
+        for context, doc, offset, is_last, whole in self._iter_docs(pairs, batch_size, n_process):
+            if whole:
+                yield context, entities_from_doc(doc)[0]
+                continue
+
+            spans.extend(doc_spans(doc, offset))
+            if is_last:
+                yield context, [(text, label) for _, _, label, text in merge_spans(spans)]
+                spans = []
+
+    def _cached_entities(self, text):
+        """Entity list for text, parsing only on a cache miss"""
+        if self.cache is None:
+            return self._parse(text)
+
+        key = self._cache_key(text)
+        entities = self.cache.get(key)
+        if entities is None:
+            entities = self._parse(text)
+            self.cache.set(key, entities)
+        return entities
+
     def extract_entities(self, text):
         """
         Extract named entities from text
@@ -30,6 +220,9 @@ class EntityExtractor:
         Returns:
             list: List of (entity_text, entity_label) tuples
         """
+        if self.cache is not None or self._needs_sharding(text):
+            return list(self._cached_entities(text))
+
         doc = self.nlp(text)
         entities = [(ent.text, ent.label_) for ent in doc.ents]
 
@@ -45,6 +238,9 @@ class EntityExtractor:
         Returns:
             dict: Entities grouped by type
         """
+        if self.cache is not None or self._needs_sharding(text):
+            return group_entities(self._cached_entities(text))
+
         doc = self.nlp(text)
         entities_dict = {}
 
@@ -55,12 +251,272 @@ class EntityExtractor:
 
         return entities_dict
 
-    def process_batch(self, texts):
-        """Process multiple texts"""
-        results = []
+    def process_batch(self, texts, batch_size=256, n_process=1):
+        """
+        Process multiple texts
+
+        Args:
+            texts: Iterable of texts
+            batch_size: Texts per spaCy batch
+            n_process: Worker processes for nlp.pipe
+
+        Returns:
+            list: One list of (entity_text, entity_label) tuples per text
+        """
+        return [
+            entities for entities, _ in
+            self.iter_entities(texts, batch_size=batch_size, n_process=n_process)
+        ]
+
+    def iter_entities(self, texts, batch_size=256, n_process=1, as_tuples=False,
+                      cache_chunk_size=10000):
+        """
+        Stream entities for many texts with a single parse per text
+
+        Args:
+            texts: Iterable (or generator) of texts, or of (id, text) tuples
+                when as_tuples is set
+            batch_size: Texts per spaCy batch
+            n_process: Worker processes for nlp.pipe (-1 for all cores)
+            as_tuples: Inputs are (id, text) and ids are passed through
+            cache_chunk_size: With a cache, texts are looked up in chunks of
+                this size and only the misses of each chunk go to nlp.pipe
+
+        Yields:
+            tuple: (entities, entities_dict), or (id, entities, entities_dict)
+                with as_tuples
+        """
+        if self.cache is not None:
+            yield from self._iter_cached(texts, batch_size, n_process, as_tuples,
+                                         cache_chunk_size)
+        elif as_tuples:
+            pairs = ((text, doc_id) for doc_id, text in texts)
+            for doc_id, entities in self._iter_parsed(pairs, batch_size, n_process):
+                yield doc_id, entities, group_entities(entities)
+        else:
+            pairs = ((text, None) for text in texts)
+            for _, entities in self._iter_parsed(pairs, batch_size, n_process):
+                yield entities, group_entities(entities)
+
+    def entity_table(self, texts, batch_size=256, n_process=1, as_tuples=False,
+                     output='pandas'):
+        """
+        Extract entities for many texts into a columnar table
+
+        Columns are doc_id, start, end, label and text, with character
+        offsets into the original text (shards are remapped). Values are
+        appended straight from doc.ents into typed arrays, so no per-entity
+        objects are built; labels are dictionary-encoded. The entity cache
+        is not consulted since it does not store offsets.
+
+        Args:
+            texts: Iterable of texts, or of (id, text) tuples with as_tuples
+                (doc_id defaults to the text's position)
+            batch_size: Texts per spaCy batch
+            n_process: Worker processes for nlp.pipe
+            as_tuples: Inputs are (id, text)
+            output: 'pandas', 'arrow' or 'numpy' (dict of arrays)
+
+        Returns:
+            Entity table in the requested format
+        """
+        if as_tuples:
+            pairs = ((text, doc_id) for doc_id, text in texts)
+        else:
+            pairs = ((text, position) for position, text in enumerate(texts))
+
+        table = EntityTable()
+        spans = []
+        for doc_id, doc, offset, is_last, whole in self._iter_docs(pairs, batch_size, n_process):
+            if whole:
+                table.add_doc(doc_id, doc)
+                continue
+
+            spans.extend(doc_spans(doc, offset))
+            if is_last:
+                table.add_spans(doc_id, merge_spans(spans))
+                spans = []
+
+        log.info(f"Built entity table: {len(table)} entities")
+        return table.to(output)
+
+    def _iter_cached(self, items, batch_size, n_process, as_tuples, chunk_size):
+        for chunk in iter_chunks(items, chunk_size):
+            if as_tuples:
+                ids = [doc_id for doc_id, _ in chunk]
+                texts = [text for _, text in chunk]
+            else:
+                texts = chunk
+
+            keys = [self._cache_key(text) for text in texts]
+            results = [self.cache.get(key) for key in keys]
+            # Parse each distinct missing text once, however often it repeats
+            missing = {}
+            for i, entities in enumerate(results):
+                if entities is None:
+                    missing.setdefault(keys[i], []).append(i)
+
+            if missing:
+                # Process startup only pays off for more than one batch
+                processes = n_process if len(missing) > batch_size else 1
+                pairs = ((texts[positions[0]], key) for key, positions in missing.items())
+                for key, entities in self._iter_parsed(pairs, batch_size, processes):
+                    self.cache.set(key, entities)
+                    for i in missing[key]:
+                        results[i] = entities
+
+            for i, entities in enumerate(results):
+                entities = list(entities)
+                if as_tuples:
+                    yield ids[i], entities, group_entities(entities)
+                else:
+                    yield entities, group_entities(entities)
+
+
+def entities_from_doc(doc):
+    """
+    Build list and grouped-dict entity formats in one pass over doc.ents
+
+    Args:
+        doc: spaCy Doc
+
+    Returns:
+        tuple: (list of (text, label) tuples, dict of label -> texts)
+    """
+    entities = []
+    entities_dict = {}
+
+    for ent in doc.ents:
+        text, label = ent.text, ent.label_
+        entities.append((text, label))
+        entities_dict.setdefault(label, []).append(text)
+
+    return entities, entities_dict
+
+
+def doc_spans(doc, offset=0):
+    """(start, end, label, text) tuples for doc.ents, shifted by offset"""
+    return [(offset + ent.start_char, offset + ent.end_char, ent.label_, ent.text)
+            for ent in doc.ents]
+
+
+def _check_shard_overlap(shard_size, overlap):
+    if overlap >= shard_size // 2:
+        raise ValueError(f"shard_overlap ({overlap}) must be less than half of "
+                         f"shard_size ({shard_size})")
+
+
+def shard_bounds(text, shard_size, overlap=200):
+    """
+    Split text into overlapping windows of at most shard_size characters
+
+    Cuts prefer a paragraph break, then a sentence end, then any space in
+    the second half of the window; the next window starts `overlap`
+    characters before the cut, at a word boundary.
+
+    Args:
+        text: Input text
+        shard_size: Maximum window length
+        overlap: Characters repeated at the start of the next window
+            (less than shard_size // 2)
+
+    Returns:
+        list: (start, end) offsets into text
+
+    Raises:
+        ValueError: If overlap is not less than half of shard_size
+    """
+    _check_shard_overlap(shard_size, overlap)
+    length = len(text)
+    if length <= shard_size:
+        return [(0, length)]
+
+    bounds = []
+    start = 0
+    while start < length:
+        end = start + shard_size
+        if end >= length:
+            bounds.append((start, length))
+            break
+
+        floor = start + shard_size // 2
+        cut = text.rfind('\n\n', floor, end)
+        if cut != -1:
+            cut += 2
+        else:
+            cut = max(text.rfind(mark, floor, end) for mark in ('. ', '! ', '? ', '.\n', '\n'))
+            if cut != -1:
+                cut += 1
+            else:
+                cut = text.rfind(' ', floor, end)
+                cut = end if cut == -1 else cut + 1
+
+        bounds.append((start, cut))
+
+        next_start = max(cut - overlap, start + 1)
+        space = text.find(' ', next_start, cut)
+        start = space + 1 if space != -1 else cut
+
+    return bounds
+
+
+def merge_spans(spans):
+    """
+    Merge entity spans from overlapping shards
+
+    Identical spans seen by two shards collapse to one, and where spans
+    conflict the earliest, then longest, wins, which drops the fragments
+    of entities truncated at a shard edge. Equal offsets with different
+    labels are resolved by label order, so the result is deterministic.
+
+    Args:
+        spans: (start, end, label, text) tuples in document offsets
+
+    Returns:
+        list: Non-overlapping spans sorted by start
+    """
+    merged = []
+    last_end = -1
+    for span in sorted(set(spans), key=lambda s: (s[0], -s[1], s[2], s[3])):
+        if span[0] >= last_end:
+            merged.append(span)
+            last_end = span[1]
+    return merged
+
+
+def group_entities(entities):
+    """Group (text, label) tuples into a dict of label -> texts"""
+    entities_dict = {}
+    for text, label in entities:
+        entities_dict.setdefault(label, []).append(text)
+    return entities_dict
+
+
+def _encode_entities(entities):
+    return json.dumps(entities).encode('utf-8')
+
+
+def _decode_entities(data):
+    return [tuple(entity) for entity in json.loads(bytes(data).decode('utf-8'))]
+
+
+def _entities_size(entities):
+    return 64 + sum(len(text) + 64 for text, _ in entities)
+
+
+def entity_cache(disk_path=None, max_entries=100000, max_bytes=256 * 1024 * 1024, **options):
+    """
+    Create a ResultCache suited to EntityExtractor results
 
-        for doc in self.nlp.pipe(texts):
-            entities = [(ent.text, ent.label_) for ent in doc.ents]
-            results.append(entities)
+    Args:
+        disk_path: Directory for the persistent store (None: memory only)
+        max_entries: In-memory entry limit
+        max_bytes: Approximate in-memory size limit
+        **options: Further ResultCache options (disk_max_bytes, num_shards)
 
-        return results
+    Returns:
+        ResultCache: Cache to pass as EntityExtractor(cache=...)
+    """
+    return ResultCache(max_entries=max_entries, max_bytes=max_bytes, disk_path=disk_path,
+                       encode=_encode_entities, decode=_decode_entities,
+                       sizeof=_entities_size, **options)
@@ -0,0 +1,87 @@
+"""Rule-based entity matching from gazetteer files"""
+import json
+from pathlib import Path
+import spacy
+from common.logger import log
+from common.result_cache import content_hash
+from common.yaml_config import load_yaml
+
+
+def load_gazetteer(file_path):
+    """
+    Load gazetteer entries as EntityRuler patterns
+
+    YAML files map labels to entries; a string entry is a phrase and a
+    mapping with a 'pattern' key is a token pattern. JSONL files use the
+    EntityRuler format directly ({"label": ..., "pattern": ...} per line).
+
+    Args:
+        file_path: .yaml/.yml or .jsonl gazetteer file
+
+    Returns:
+        list: EntityRuler pattern dicts
+    """
+    path = Path(file_path)
+    if path.suffix == '.jsonl':
+        with open(path, 'r', encoding='utf-8') as f:
+            patterns = [json.loads(line) for line in f if line.strip()]
+    else:
+        patterns = []
+        for label, entries in (load_yaml(path) or {}).items():
+            for entry in entries:
+                if isinstance(entry, dict):
+                    patterns.append({'label': label, **entry})
+                else:
+                    patterns.append({'label': label, 'pattern': str(entry)})
+
+    for pattern in patterns:
+        if 'label' not in pattern or 'pattern' not in pattern:
+            raise ValueError(f"Gazetteer entry needs 'label' and 'pattern': {pattern}")
+
+    log.info(f"Loaded {len(patterns)} gazetteer patterns from {path}")
+    return patterns
+
+
+def gazetteer_fingerprint(patterns, phrase_attr='ORTH'):
+    """Stable fingerprint of a pattern list, for cache keys"""
+    return content_hash(json.dumps([phrase_attr, patterns], sort_keys=True))
+
+
+def add_gazetteer(nlp, patterns, phrase_attr='ORTH'):
+    """
+    Add an EntityRuler with the given patterns to a pipeline
+
+    The ruler runs before the statistical NER when there is one, so known
+    entities are fixed first and the model only labels the rest. Phrase
+    entries are compiled into a PhraseMatcher, which matches every term in
+    a single pass over the tokens.
+
+    Args:
+        nlp: spaCy pipeline
+        patterns: EntityRuler pattern dicts (see load_gazetteer)
+        phrase_attr: Token attribute phrases match on ('ORTH' or 'LOWER')
+
+    Returns:
+        EntityRuler: The added component
+    """
+    options = {'before': 'ner'} if 'ner' in nlp.pipe_names else {}
+    ruler = nlp.add_pipe('entity_ruler', config={'phrase_matcher_attr': phrase_attr}, **options)
+    ruler.add_patterns(patterns)
+    return ruler
+
+
+def gazetteer_pipeline(patterns, lang='en', phrase_attr='ORTH'):
+    """
+    Tokenizer-only pipeline that tags gazetteer entities
+
+    Args:
+        patterns: EntityRuler pattern dicts
+        lang: spaCy language code
+        phrase_attr: Token attribute phrases match on
+
+    Returns:
+        spacy.language.Language: Pipeline with only an EntityRuler
+    """
+    nlp = spacy.blank(lang)
+    add_gazetteer(nlp, patterns, phrase_attr)
+    return nlp
@@ -0,0 +1,284 @@
+"""Interchangeable PDF text extraction engines"""
+import importlib
+import importlib.util
+from importlib import metadata
+from common.logger import log
+
+
+class PDFBackend:
+    """
+    Base class for a PDF text engine
+
+    Subclasses set `name`, the importable `module` and its `distribution`
+    name, and implement page_count() and iter_pages(). Backends that know
+    the page layout also override iter_blocks(). Backends are looked up by
+    name in worker processes, so only names cross process boundaries.
+    """
+
+    name = None
+    module = None
+    distribution = None
+
+    @classmethod
+    def available(cls):
+        return importlib.util.find_spec(cls.module) is not None
+
+    @classmethod
+    def version(cls):
+        try:
+            return metadata.version(cls.distribution)
+        except metadata.PackageNotFoundError:
+            return getattr(importlib.import_module(cls.module), '__version__', 'unknown')
+
+    def page_count(self, pdf_path):
+        """Return the number of pages in pdf_path"""
+        raise NotImplementedError
+
+    def iter_pages(self, pdf_path, start=0, end=None):
+        """Yield the text of pages [start, end), opening the file once"""
+        raise NotImplementedError
+
+    def iter_blocks(self, pdf_path, start=0, end=None):
+        """
+        Yield the text blocks of pages [start, end)
+
+        The default treats every non-empty line of the page text as a
+        block, without position or font information.
+
+        Yields:
+            list: Per page, dicts with text, bbox (x0, y0, x1, y1 or None)
+                and font_size (or None), in reading order
+        """
+        for text in self.iter_pages(pdf_path, start, end):
+            yield [text_block(line) for line in text.splitlines() if line.strip()]
+
+
+def text_block(text, bbox=None, font_size=None):
+    """Block dict as yielded by PDFBackend.iter_blocks"""
+    return {'text': text, 'bbox': bbox, 'font_size': font_size}
+
+
+class PyMuPDFBackend(PDFBackend):
+    name = 'pymupdf'
+    module = 'fitz'
+    distribution = 'PyMuPDF'
+
+    def page_count(self, pdf_path):
+        import fitz
+
+        with fitz.open(pdf_path) as document:
+            return document.page_count
+
+    def iter_pages(self, pdf_path, start=0, end=None):
+        import fitz
+
+        with fitz.open(pdf_path) as document:
+            end = document.page_count if end is None else end
+            for page_num in range(start, end):
+                yield document[page_num].get_text()
+
+    def iter_blocks(self, pdf_path, start=0, end=None):
+        import fitz
+
+        with fitz.open(pdf_path) as document:
+            end = document.page_count if end is None else end
+            for page_num in range(start, end):
+                blocks = []
+                for block in document[page_num].get_text('dict')['blocks']:
+                    spans = [span for line in block.get('lines', ()) for span in line['spans']]
+                    lines = ["".join(span['text'] for span in line['spans'])
+                             for line in block.get('lines', ())]
+                    text = "\n".join(lines)
+                    if text.strip():
+                        blocks.append(text_block(text, tuple(block['bbox']),
+                                                 max(span['size'] for span in spans)))
+                yield blocks
+
+
+class PdfiumBackend(PDFBackend):
+    name = 'pypdfium2'
+    module = 'pypdfium2'
+    distribution = 'pypdfium2'
+
+    def page_count(self, pdf_path):
+        import pypdfium2
+
+        document = pypdfium2.PdfDocument(pdf_path)
+        try:
+            return len(document)
+        finally:
+            document.close()
+
+    def iter_pages(self, pdf_path, start=0, end=None):
+        import pypdfium2
+
+        document = pypdfium2.PdfDocument(pdf_path)
+        try:
+            end = len(document) if end is None else end
+            for page_num in range(start, end):
+                page = document[page_num]
+                text_page = page.get_textpage()
+                try:
+                    yield text_page.get_text_range()
+                finally:
+                    text_page.close()
+                    page.close()
+        finally:
+            document.close()
+
+
+class PypdfBackend(PDFBackend):
+    name = 'pypdf'
+    module = 'pypdf'
+    distribution = 'pypdf'
+
+    def _reader(self, file):
+        return importlib.import_module(self.module).PdfReader(file)
+
+    def page_count(self, pdf_path):
+        with open(pdf_path, 'rb') as file:
+            return len(self._reader(file).pages)
+
+    def iter_pages(self, pdf_path, start=0, end=None):
+        with open(pdf_path, 'rb') as file:
+            pdf_reader = self._reader(file)
+            end = len(pdf_reader.pages) if end is None else end
+            for page_num in range(start, end):
+                yield pdf_reader.pages[page_num].extract_text()
+
+    def iter_blocks(self, pdf_path, start=0, end=None):
+        # The text visitor reports each fragment's font size; fragments are
+        # grouped into lines, which become blocks (no bounding boxes)
+        with open(pdf_path, 'rb') as file:
+            pdf_reader = self._reader(file)
+            end = len(pdf_reader.pages) if end is None else end
+            for page_num in range(start, end):
+                lines = [[]]
+                sizes = [0.0]
+
+                def visit(text, cm, tm, font_dict, font_size):
+                    for number, part in enumerate(text.split('\n')):
+                        if number:
+                            lines.append([])
+                            sizes.append(0.0)
+                        if part:
+                            lines[-1].append(part)
+                            sizes[-1] = max(sizes[-1], font_size or 0.0)
+
+                pdf_reader.pages[page_num].extract_text(visitor_text=visit)
+                yield [text_block("".join(parts), None, size or None)
+                       for parts, size in zip(lines, sizes) if "".join(parts).strip()]
+
+
+class PyPDF2Backend(PypdfBackend):
+    name = 'pypdf2'
+    module = 'PyPDF2'
+    distribution = 'PyPDF2'
+
+
+def _page_numbers(start, end):
+    """pdfminer page_numbers for pages [start, end): None for the whole file"""
+    if start == 0 and end is None:
+        return None
+    return range(start, end if end is not None else 2 ** 31)
+
+
+class PdfminerBackend(PDFBackend):
+    name = 'pdfminer'
+    module = 'pdfminer'
+    distribution = 'pdfminer.six'
+
+    def page_count(self, pdf_path):
+        from pdfminer.pdfpage import PDFPage
+
+        with open(pdf_path, 'rb') as file:
+            return sum(1 for _ in PDFPage.get_pages(file))
+
+    def iter_pages(self, pdf_path, start=0, end=None):
+        from pdfminer.high_level import extract_pages
+        from pdfminer.layout import LTTextContainer
+
+        # pdfminer treats an empty page_numbers as "every page"
+        if end is not None and start >= end:
+            return
+        page_numbers = _page_numbers(start, end)
+        for layout in extract_pages(pdf_path, page_numbers=page_numbers):
+            yield "".join(element.get_text() for element in layout
+                          if isinstance(element, LTTextContainer))
+
+    def iter_blocks(self, pdf_path, start=0, end=None):
+        from pdfminer.high_level import extract_pages
+        from pdfminer.layout import LTChar, LTTextContainer
+
+        # pdfminer treats an empty page_numbers as "every page"
+        if end is not None and start >= end:
+            return
+        page_numbers = _page_numbers(start, end)
+        for layout in extract_pages(pdf_path, page_numbers=page_numbers):
+            blocks = []
+            # pdfminer's y axis points up; report top-down like PyMuPDF
+            height = layout.height
+            for element in layout:
+                if not isinstance(element, LTTextContainer) or not element.get_text().strip():
+                    continue
+                sizes = [char.size for line in element for char in line
+                         if isinstance(char, LTChar)]
+                x0, y0, x1, y1 = element.bbox
+                blocks.append(text_block(element.get_text().rstrip('\n'),
+                                         (x0, height - y1, x1, height - y0),
+                                         max(sizes) if sizes else None))
+            yield blocks
+
+
+# Fastest first; 'auto' picks the first installed one, the rest are fallbacks
+BACKENDS = {
+    backend.name: backend for backend in (
+        PyMuPDFBackend, PdfiumBackend, PypdfBackend, PdfminerBackend, PyPDF2Backend,
+    )
+}
+
+_instances = {}
+
+
+def get_backend(name):
+    """Return the shared backend instance for name"""
+    backend = _instances.get(name)
+    if backend is None:
+        if name not in BACKENDS:
+            raise ValueError(f"Unknown PDF backend: {name} (choose from {list(BACKENDS)})")
+        backend = _instances[name] = BACKENDS[name]()
+    return backend
+
+
+def available_backends():
+    """Names of installed backends, fastest first"""
+    return [name for name, backend in BACKENDS.items() if backend.available()]
+
+
+def resolve_backends(backend='auto', fallback=True):
+    """
+    Choose the backend chain for an extractor
+
+    Args:
+        backend: Backend name, list of names, or 'auto' for the fastest
+            installed one
+        fallback: Append the remaining installed backends, tried in order
+            when a file fails
+
+    Returns:
+        tuple: Backend names, primary first
+    """
+    installed = available_backends()
+    if backend == 'auto':
+        chosen = installed[:1]
+    else:
+        chosen = [backend] if isinstance(backend, str) else list(backend)
+        for name in chosen:
+            if not get_backend(name).available():
+                log.warning(f"PDF backend {name} is not installed")
+
+    if fallback:
+        chosen += [name for name in installed if name not in chosen]
+    if not chosen:
+        raise ImportError(f"No PDF backend installed (install one of {list(BACKENDS)})")
+    return tuple(chosen)
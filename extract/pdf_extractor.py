@@ -1,13 +1,537 @@
 """PDF text extraction with memory optimization"""
+import json
+import os
+import re
+import time
+import zlib
+from itertools import chain, islice
+from multiprocessing import cpu_count
 from pathlib import Path
+from common.file_utilities import calculate_md5
 from common.logger import log
+from common.parallel_processor import ParallelProcessor
+from common.result_cache import ResultCache, content_hash
+from extract.pdf_backends import get_backend, resolve_backends
+from extract.pdf_guard import extraction_failure, iter_guarded, iter_guarded_pages
+
+
+def page_ranges(num_pages, pages_per_range):
+    """Split [0, num_pages) into consecutive (start, end) ranges"""
+    return [(start, min(start + pages_per_range, num_pages))
+            for start in range(0, num_pages, pages_per_range)]
+
+
+def count_pages(pdf_path, backends=None):
+    """Return the number of pages in a PDF, trying each backend in turn"""
+    errors = []
+    for name in backends or resolve_backends():
+        try:
+            return get_backend(name).page_count(pdf_path)
+        except FileNotFoundError:
+            raise
+        except Exception as e:
+            errors.append(f"{name}: {e}")
+    raise RuntimeError(f"All PDF backends failed on {pdf_path}: {'; '.join(errors)}")
+
+
+def iter_page_texts(pdf_path, backends, start=0, end=None):
+    """
+    Yield the text of pages [start, end) with per-file fallback
+
+    When a backend fails, the next one resumes from the failing page, so
+    pages already yielded are not repeated.
+
+    Args:
+        pdf_path: Path to PDF file
+        backends: Backend names, primary first
+        start: First page (0-based)
+        end: Page after the last one (default: end of file)
+
+    Yields:
+        str: Page text
+    """
+    return _iter_with_fallback(pdf_path, backends, start, end, 'iter_pages')
+
+
+def iter_page_blocks(pdf_path, backends, start=0, end=None):
+    """
+    Yield the layout blocks of pages [start, end) with per-file fallback
+
+    Args:
+        pdf_path: Path to PDF file
+        backends: Backend names, primary first
+        start: First page (0-based)
+        end: Page after the last one (default: end of file)
+
+    Yields:
+        list: Block dicts of one page (see PdfBackend.iter_blocks)
+    """
+    return _iter_with_fallback(pdf_path, backends, start, end, 'iter_blocks')
+
+
+def _iter_with_fallback(pdf_path, backends, start, end, method):
+    """Yield per-page results of a backend method, resuming on the next backend"""
+    errors = []
+    position = start
+    for name in backends:
+        try:
+            for page in getattr(get_backend(name), method)(pdf_path, position, end):
+                position += 1
+                yield page
+            return
+        except (FileNotFoundError, MemoryError):
+            raise
+        except Exception as e:
+            errors.append(f"{name}: {e}")
+            log.warning(f"PDF backend {name} failed on {pdf_path} at page {position + 1}: {e}")
+    raise RuntimeError(f"All PDF backends failed on {pdf_path}: {'; '.join(errors)}")
+
+
+def _extract_range(task):
+    """
+    process_stream adapter: extract pages [start, end) in a worker
+
+    Args:
+        task: (pdf_path, start, end, backends)
+
+    Returns:
+        tuple: (page texts or None, seconds, error message or None)
+    """
+    pdf_path, start, end, backends = task
+    began = time.perf_counter()
+    try:
+        texts = list(iter_page_texts(pdf_path, backends, start, end))
+        return texts, time.perf_counter() - began, None
+    except Exception as e:
+        return None, time.perf_counter() - began, str(e)
+
+
+def _batch_task(task):
+    """process_stream adapter for batch_extract page-range tasks"""
+    pdf_file, pages, error, is_last, backends = task
+    if pages is None:
+        return pdf_file, [], 0.0, error, is_last
+    texts, seconds, error = _extract_range((pdf_file,) + pages + (backends,))
+    return pdf_file, texts or [], seconds, error, is_last
+
+
+def _file_stats(text, pages, seconds):
+    return {
+        'text': text,
+        'pages': pages,
+        'seconds': seconds,
+        'pages_per_sec': pages / seconds if seconds else 0.0,
+    }
+
+
+def sink_names(pdf_files):
+    """
+    Output file names for a directory sink
+
+    Files are named <stem>.txt; PDFs sharing a stem (same name in different
+    directories) get <stem>-<hash of their directory>.txt instead, so no
+    output overwrites another and names do not depend on file order.
+
+    Args:
+        pdf_files: PDF paths
+
+    Returns:
+        dict: pdf path -> output file name
+    """
+    stems = {}
+    for pdf_file in dict.fromkeys(pdf_files):
+        stems.setdefault(Path(pdf_file).stem, []).append(pdf_file)
+
+    names = {}
+    for stem, paths in stems.items():
+        for pdf_file in paths:
+            if len(paths) == 1:
+                names[pdf_file] = f"{stem}.txt"
+            else:
+                parent = str(Path(pdf_file).resolve().parent)
+                names[pdf_file] = f"{stem}-{content_hash(parent, 4)}.txt"
+    return names
+
+
+def _open_sink(sink, pdf_path, name=None):
+    """
+    Resolve a batch output sink for one file
+
+    Directory sinks are written to a temporary file that _close_sink
+    renames into place, so failed files leave no partial output.
+
+    Args:
+        sink: Directory (str/Path) to write text files into, or a
+            callable returning a writable text file object for pdf_path
+        name: Output file name in a directory sink (default: <stem>.txt)
+
+    Returns:
+        tuple: (file object, output name, temporary path or None)
+    """
+    if callable(sink):
+        output = sink(pdf_path)
+        return output, getattr(output, 'name', None), None
+
+    directory = Path(sink)
+    directory.mkdir(parents=True, exist_ok=True)
+    path = directory / (name or f"{Path(pdf_path).stem}.txt")
+    temp_path = path.with_name(f".{path.name}.part")
+    return open(temp_path, 'w', encoding='utf-8'), str(path), str(temp_path)
+
+
+def _close_sink(output, name, temp_path, succeeded):
+    """Close a sink file, moving a directory sink's temporary file into place or removing it"""
+    output.close()
+    if temp_path is None:
+        return
+    if succeeded:
+        os.replace(temp_path, name)
+    else:
+        os.unlink(temp_path)
+
+
+_NUMBER = re.compile(r'\d+')
+
+
+def _furniture_key(block, index, count, edge_blocks):
+    """Position-qualified, digit-insensitive key of a page-edge block, else None"""
+    if index < edge_blocks:
+        zone = 'top'
+    elif index >= count - edge_blocks:
+        zone = 'bottom'
+    else:
+        return None
+    return zone, _NUMBER.sub('#', ' '.join(block['text'].lower().split()))
+
+
+def _counts_pages(occurrences):
+    """True if the blocks are identical or differ only in a page counter"""
+    width = len(occurrences[0][1])
+    varying = [i for i in range(width)
+               if len({numbers[i] for _, numbers in occurrences}) > 1]
+    if not varying:
+        return True
+    return (len(varying) == 1
+            and len({numbers[varying[0]] - page for page, numbers in occurrences}) == 1)
+
+
+def detect_page_furniture(pages, edge_blocks=2, min_ratio=0.6, min_pages=3):
+    """
+    Find headers and footers repeated across pages
+
+    A block is furniture when it sits among the first or last edge_blocks
+    blocks of at least min_ratio of the pages with the same text, where
+    only a single number may differ and only by advancing with the page
+    (so "Page 3 of 10" matches "Page 4 of 10", but numbered body lines do
+    not).
+
+    Args:
+        pages: Lists of block dicts, one per page
+        edge_blocks: Blocks at the top and bottom of each page considered
+        min_ratio: Fraction of pages a block must repeat on
+        min_pages: Minimum pages before anything is treated as furniture
+
+    Returns:
+        set: Furniture keys for _furniture_key
+    """
+    if len(pages) < min_pages:
+        return set()
+
+    occurrences = {}
+    for page, blocks in enumerate(pages):
+        for index, block in enumerate(blocks):
+            key = _furniture_key(block, index, len(blocks), edge_blocks)
+            if key is not None:
+                numbers = tuple(int(n) for n in _NUMBER.findall(block['text']))
+                occurrences.setdefault(key, {}).setdefault(page, numbers)
+
+    threshold = max(min_ratio * len(pages), 2)
+    return {key for key, seen in occurrences.items()
+            if len(seen) >= threshold and _counts_pages(list(seen.items()))}
+
+
+def blocks_to_text(blocks):
+    """Join blocks into text with a blank line between blocks"""
+    return "\n\n".join(block['text'] for block in blocks)
+
+
+def _encode_pages(pages):
+    return zlib.compress(json.dumps(pages).encode('utf-8', errors='surrogatepass'))
+
+
+def _decode_pages(data):
+    return json.loads(zlib.decompress(bytes(data)).decode('utf-8', errors='surrogatepass'))
+
+
+def _pages_size(entry):
+    return 128 + sum(len(text) + 64 for text in entry['pages'])
+
+
+def pdf_text_cache(disk_path, max_entries=256, max_bytes=256 * 1024 * 1024,
+                   disk_max_bytes=4 * 1024 * 1024 * 1024, **options):
+    """
+    Create a ResultCache for extracted PDF text
+
+    Entries hold a file's MD5 and page texts, zlib-compressed on disk; a
+    small in-memory LRU sits in front for files seen twice in one run.
+
+    Args:
+        disk_path: Directory for the persistent store
+        max_entries: In-memory entry limit
+        max_bytes: Approximate in-memory size limit
+        disk_max_bytes: On-disk size limit
+        **options: Further ResultCache options (num_shards)
+
+    Returns:
+        ResultCache: Cache to pass as PDFExtractor(cache=...)
+    """
+    return ResultCache(max_entries=max_entries, max_bytes=max_bytes, disk_path=disk_path,
+                       disk_max_bytes=disk_max_bytes, encode=_encode_pages,
+                       decode=_decode_pages, sizeof=_pages_size, **options)
+
 
 class PDFExtractor:
-    """Extract text from PDF files with memory optimization"""
+    """
+    Extract text from PDF files with memory optimization
 
-    def __init__(self, chunk_size=100):
+    Text comes from the fastest installed engine (PyMuPDF, pypdfium2,
+    pypdf, pdfminer.six, PyPDF2), falling back to the others per file.
+    Pages are read one at a time through iter_pages(), so streaming
+    consumers hold O(one page) of text. Large PDFs are split into page
+    ranges of chunk_size pages that are extracted by a process pool and
+    yielded in page order; batches spread the page ranges of all files over
+    a single pool, so small and large files share the workers.
+
+    In guarded mode every file runs in its own killable process with page,
+    file and memory limits (see pdf_guard.iter_guarded), so pathological
+    files fail with a structured reason instead of stalling the batch.
+    This covers every entry point: the streaming methods (iter_pages,
+    iter_chunks, iter_blocks) read from a guarded worker page by page and
+    raise pdf_guard.GuardedExtractionError when a file fails.
+    """
+
+    def __init__(self, chunk_size=100, workers=1, parallel_min_pages=200, backend='auto',
+                 fallback=True, cache=None, guarded=False, page_timeout=60, file_timeout=None,
+                 memory_limit=None, skip_bad_pages=False):
+        """
+        Initialize extractor
+
+        Args:
+            chunk_size: Pages per range handed to a worker
+            workers: Worker processes (None for all cores, 1 for sequential)
+            parallel_min_pages: Single files shorter than this are
+                extracted in-process
+            backend: PDF engine name (see pdf_backends.BACKENDS), list of
+                names, or 'auto' for the fastest installed one
+            fallback: Retry failing files with the other installed engines
+            cache: Optional ResultCache (see pdf_text_cache) so unchanged
+                files are not parsed again
+            guarded: Extract each file in an isolated, killable process
+            page_timeout: Guarded mode: seconds allowed per page
+            file_timeout: Guarded mode: seconds allowed per file
+            memory_limit: Guarded mode: worker RSS ceiling in bytes
+            skip_bad_pages: Guarded mode: skip pages that hang or fail
+                instead of failing the whole file
+        """
         self.extracted_count = 0
         self.chunk_size = chunk_size
+        self.workers = workers or cpu_count()
+        self.parallel_min_pages = parallel_min_pages
+        self.backends = resolve_backends(backend, fallback)
+        self.cache = cache
+        self.guarded = guarded
+        self.page_timeout = page_timeout
+        self.file_timeout = file_timeout
+        self.memory_limit = memory_limit
+        self.skip_bad_pages = skip_bad_pages
+        self.failed_count = 0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.bytes_saved = 0
+        self._backend_version = None
+        log.debug(f"PDF backends: {', '.join(self.backends)}")
+
+    @property
+    def backend(self):
+        """Name of the primary PDF engine"""
+        return self.backends[0]
+
+    @property
+    def cache_hit_rate(self):
+        lookups = self.cache_hits + self.cache_misses
+        return self.cache_hits / lookups if lookups else 0.0
+
+    def _cache_key(self, pdf_path):
+        """
+        Cache key for a file: size, mtime and primary backend version
+
+        The entry stores the file's MD5, which is only computed to confirm
+        a candidate entry, so files without one are never read twice.
+
+        Returns:
+            tuple: (key, file size)
+        """
+        if self._backend_version is None:
+            self._backend_version = get_backend(self.backend).version()
+
+        stat = os.stat(pdf_path)
+        fingerprint = (f"{stat.st_size}:{stat.st_mtime_ns}:"
+                       f"{self.backend}:{self._backend_version}")
+        return content_hash(fingerprint), stat.st_size
+
+    def _cache_lookup(self, pdf_path):
+        """
+        Look up cached page texts for a file
+
+        Returns:
+            tuple: (key, page texts); key is None without a cache or when
+                the file cannot be fingerprinted, texts are None on a miss
+        """
+        if self.cache is None:
+            return None, None
+
+        try:
+            key, size = self._cache_key(pdf_path)
+            entry = self.cache.get(key)
+            if entry is not None and entry['md5'] != calculate_md5(pdf_path):
+                entry = None
+        except OSError:
+            self.cache_misses += 1
+            return None, None
+
+        if entry is None:
+            self.cache_misses += 1
+            return key, None
+        self.cache_hits += 1
+        self.bytes_saved += size
+        return key, entry['pages']
+
+    def _cache_store(self, pdf_path, key, texts):
+        try:
+            self.cache.set(key, {'md5': calculate_md5(pdf_path), 'pages': texts})
+        except OSError as e:
+            log.warning(f"Not caching {pdf_path}: {e}")
+
+    def iter_pages(self, pdf_path):
+        """
+        Lazily yield the text of each page
+
+        Only one page is held at a time, so the cache (which stores whole
+        files) is not used here; see extract_text and batch_extract.
+
+        Args:
+            pdf_path: Path to PDF file
+
+        Yields:
+            tuple: (page_number, text), page numbers starting at 1
+
+        Raises:
+            GuardedExtractionError: In guarded mode, when the file fails
+        """
+        if self.guarded:
+            return self._iter_guarded_pages(pdf_path, 'iter_pages')
+        return self._iter_pages(pdf_path)
+
+    def _iter_guarded_pages(self, pdf_path, method):
+        return iter_guarded_pages(pdf_path, self.backends, method, self.page_timeout,
+                                  self.file_timeout, self.memory_limit, self.skip_bad_pages)
+
+    def _iter_pages(self, pdf_path):
+        num_pages = count_pages(pdf_path, self.backends) if self.workers > 1 else 0
+        if num_pages >= self.parallel_min_pages and num_pages > self.chunk_size:
+            ranges = page_ranges(num_pages, self.chunk_size)
+            processor = ParallelProcessor(min(self.workers, len(ranges)))
+            tasks = ((pdf_path, start, end, self.backends) for start, end in ranges)
+            page_number = 0
+            for texts, _, error in processor.process_stream(_extract_range, tasks, chunk_size=1):
+                if error is not None:
+                    raise RuntimeError(f"{pdf_path} pages {page_number + 1}+: {error}")
+                for text in texts:
+                    page_number += 1
+                    yield page_number, text
+            return
+
+        for page_number, text in enumerate(iter_page_texts(pdf_path, self.backends), 1):
+            yield page_number, text
+
+    def iter_blocks(self, pdf_path, drop_furniture=False, furniture_sample=20, edge_blocks=2):
+        """
+        Lazily yield layout blocks, optionally without headers and footers
+
+        Furniture is learned from the first furniture_sample pages, which
+        are buffered; later pages stream through the learned filter, so
+        memory stays O(sample) rather than O(document).
+
+        Args:
+            pdf_path: Path to PDF file
+            drop_furniture: Drop blocks repeated at the top/bottom of pages
+            furniture_sample: Pages used to detect furniture
+            edge_blocks: Blocks at each page edge that may be furniture
+
+        Yields:
+            dict: page (1-based), index (within the page), text, bbox
+                (None if the backend has no layout) and font_size
+
+        Raises:
+            GuardedExtractionError: In guarded mode, when the file fails
+        """
+        if self.guarded:
+            pages = self._iter_guarded_pages(pdf_path, 'iter_blocks')
+        else:
+            pages = enumerate(iter_page_blocks(pdf_path, self.backends), 1)
+        furniture = set()
+        if drop_furniture:
+            sample = list(islice(pages, furniture_sample))
+            furniture = detect_page_furniture([blocks for _, blocks in sample], edge_blocks)
+            if furniture:
+                log.debug(f"Dropping {len(furniture)} repeated header/footer blocks "
+                          f"from {pdf_path}")
+            pages = chain(sample, pages)
+
+        for page_number, blocks in pages:
+            for index, block in enumerate(blocks):
+                if furniture and _furniture_key(block, index, len(blocks), edge_blocks) in furniture:
+                    continue
+                yield {'page': page_number, 'index': index, **block}
+
+    def extract_blocks(self, pdf_path, drop_furniture=True):
+        """
+        Extract layout blocks from a PDF
+
+        Args:
+            pdf_path: Path to PDF file
+            drop_furniture: Drop repeated headers and footers
+
+        Returns:
+            list: Block dicts (see iter_blocks); empty on failure
+        """
+        try:
+            blocks = list(self.iter_blocks(pdf_path, drop_furniture))
+            self.extracted_count += 1
+            log.info(f"Extracted {len(blocks)} blocks from {pdf_path}")
+            return blocks
+        except Exception as e:
+            log.error(f"PDF extraction error: {e}")
+            self.failed_count += 1
+            return []
+
+    def iter_chunks(self, pdf_path, pages_per_chunk=None):
+        """
+        Lazily yield the text of consecutive page groups
+
+        Args:
+            pdf_path: Path to PDF file
+            pages_per_chunk: Pages joined per chunk (default: chunk_size)
+
+        Yields:
+            str: Text of up to pages_per_chunk pages
+        """
+        pages = self.iter_pages(pdf_path)
+        while True:
+            chunk = [text for _, text in islice(pages, pages_per_chunk or self.chunk_size)]
+            if not chunk:
+                return
+            yield "".join(chunk)
 
     def extract_text(self, pdf_path):
         """
@@ -19,42 +543,207 @@ class PDFExtractor:
         Returns:
             str: Extracted text
         """
-        try:
-            import PyPDF2
+        return self.extract_with_stats(pdf_path)['text']
 
-            text_chunks = []
-            with open(pdf_path, 'rb') as file:
-                pdf_reader = PyPDF2.PdfReader(file)
-                num_pages = len(pdf_reader.pages)
-
-                # Process in chunks to avoid memory issues
-                for i in range(0, num_pages, self.chunk_size):
-                    chunk_text = ""
-                    end_page = min(i + self.chunk_size, num_pages)
+    def extract_with_stats(self, pdf_path):
+        """
+        Extract text from a PDF and time it
 
-                    for page_num in range(i, end_page):
-                        page = pdf_reader.pages[page_num]
-                        chunk_text += page.extract_text()
+        Args:
+            pdf_path: Path to PDF file
 
-                    text_chunks.append(chunk_text)
+        Returns:
+            dict: text, pages, seconds and pages_per_sec
+        """
+        if self.guarded:
+            return self.batch_extract([pdf_path], with_stats=True)[pdf_path]
 
-            text = "".join(text_chunks)
+        began = time.perf_counter()
+        try:
+            key, texts = self._cache_lookup(pdf_path)
+            if texts is None:
+                texts = [text for _, text in self._iter_pages(pdf_path)]
+                if key is not None:
+                    self._cache_store(pdf_path, key, texts)
+            text = "".join(texts)
             self.extracted_count += 1
-            log.info(f"Extracted text from {pdf_path} ({num_pages} pages)")
-
-            return text
+            log.info(f"Extracted text from {pdf_path} ({len(texts)} pages)")
+            return _file_stats(text, len(texts), time.perf_counter() - began)
 
         except Exception as e:
             log.error(f"PDF extraction error: {e}")
-            return ""
+            self.failed_count += 1
+            result = _file_stats("", 0, time.perf_counter() - began)
+            result['failure'] = extraction_failure('error', str(e))
+            return result
+
+    def batch_extract(self, pdf_files, workers=None, with_stats=False, sink=None):
+        """
+        Extract text from multiple PDFs
+
+        Args:
+            pdf_files: PDF paths
+            workers: Worker processes (default: self.workers)
+            with_stats: Return stats dicts (see extract_with_stats) instead
+                of text
+            sink: Write each file's text page by page to a sink instead of
+                returning it: a directory for <stem>.txt files (see
+                sink_names; each appears only once its file succeeded), or a
+                callable mapping a PDF path to a writable text file object
+                (closed when the file is done)
+
+        Returns:
+            dict: pdf path -> text, or -> output name with a sink, or -> stats
+                dict with with_stats ('text' is None and 'output' is set
+                when writing to a sink, None for a failed file in a
+                directory sink; 'cached' marks cache hits;
+                'failure' holds the reason a file failed and
+                'skipped_pages' the pages dropped in guarded mode)
+
+        With a cache, unchanged files are served from it and only the rest
+        are parsed; parsed files are kept in memory until stored, even when
+        writing to a sink.
+        """
+        workers = workers or self.workers
+        pdf_files = list(pdf_files)
+        began = time.perf_counter()
+
+        keys = {}
+        cached = {}
+        for pdf_file in pdf_files if self.cache is not None else ():
+            keys[pdf_file], pages = self._cache_lookup(pdf_file)
+            if pages is not None:
+                cached[pdf_file] = pages
+
+        misses = [pdf_file for pdf_file in pdf_files if pdf_file not in cached]
+        skipped = {}
+        if self.guarded:
+            parsed = self._iter_guarded(misses, workers, skipped)
+        elif workers <= 1:
+            parsed = self._iter_sequential(misses)
+        else:
+            parsed = self._iter_parallel(misses, workers)
+        hits = ((pdf_file, pages, 0.0, None, True) for pdf_file, pages in cached.items())
+
+        names = sink_names(pdf_files) if sink is not None and not callable(sink) else {}
+        stats = {}
+        current = None
+        for pdf_file, texts, seconds, error, is_last in chain(hits, parsed):
+            if current is None:
+                current = self._start_file(pdf_file, sink, keys.get(pdf_file),
+                                           pdf_file in cached, names.get(pdf_file))
+
+            if error is None and current['error'] is None:
+                current['pages'] += len(texts)
+                current['seconds'] += seconds
+                if current['output'] is not None:
+                    current['output'].writelines(texts)
+                if current['output'] is None or current['key'] is not None:
+                    current['texts'].extend(texts)
+            elif current['error'] is None:
+                current['error'] = error
+
+            if is_last:
+                stats[pdf_file] = self._finish_file(pdf_file, current)
+                stats[pdf_file]['skipped_pages'] = skipped.get(pdf_file, [])
+                current = None
 
-    def batch_extract(self, pdf_files):
-        """Extract text from multiple PDFs"""
-        results = {}
+        total_pages = sum(result['pages'] for result in stats.values())
+        elapsed = time.perf_counter() - began
+        log.info(f"Batch extraction complete: {len(stats)} files, {total_pages} pages "
+                 f"({total_pages / elapsed if elapsed else 0:.1f} pages/sec)")
+        if self.cache is not None:
+            log.info(f"PDF text cache: {len(cached)} hits, {len(misses)} misses "
+                     f"({self.cache_hit_rate:.1%} overall, {self.bytes_saved} bytes not re-parsed)")
+
+        stats = {pdf_file: stats[pdf_file] for pdf_file in pdf_files}
+        if with_stats:
+            return stats
+        key = 'text' if sink is None else 'output'
+        return {pdf_file: result[key] for pdf_file, result in stats.items()}
+
+    def _start_file(self, pdf_file, sink, key=None, cached=False, name=None):
+        output, name, temp_path = (_open_sink(sink, pdf_file, name) if sink is not None
+                                   else (None, None, None))
+        return {'pages': 0, 'seconds': 0.0, 'texts': [], 'output': output, 'name': name,
+                'temp_path': temp_path, 'error': None, 'key': None if cached else key,
+                'cached': cached}
+
+    def _finish_file(self, pdf_file, current):
+        failure = current['error']
+        if current['output'] is not None:
+            _close_sink(current['output'], current['name'], current['temp_path'],
+                        failure is None)
+            if failure is not None and current['temp_path'] is not None:
+                current['name'] = None
+
+        if failure is not None:
+            if not isinstance(failure, dict):
+                failure = extraction_failure('error', failure)
+            log.error(f"PDF extraction error: {failure['message']}")
+            self.failed_count += 1
+            result = _file_stats("", 0, current['seconds'])
+        else:
+            if current['key'] is not None:
+                self._cache_store(pdf_file, current['key'], current['texts'])
+            self.extracted_count += 1
+            log.info(f"Extracted text from {pdf_file} ({current['pages']} pages)")
+            result = _file_stats("".join(current['texts']), current['pages'], current['seconds'])
 
+        result['cached'] = current['cached']
+        result['failure'] = failure
+        if current['output'] is not None:
+            result['text'] = None
+            result['output'] = current['name']
+        return result
+
+    def _iter_sequential(self, pdf_files):
+        """Yield (pdf_file, page texts, seconds, error, is_last) one page at a time"""
         for pdf_file in pdf_files:
-            text = self.extract_text(pdf_file)
-            results[pdf_file] = text
+            began = time.perf_counter()
+            try:
+                for _, text in self._iter_pages(pdf_file):
+                    now = time.perf_counter()
+                    yield pdf_file, [text], now - began, None, False
+                    began = now
+                yield pdf_file, [], time.perf_counter() - began, None, True
+            except Exception as e:
+                yield pdf_file, [], 0.0, str(e), True
+
+    def _iter_parallel(self, pdf_files, workers):
+        """
+        Yield (pdf_file, page texts, seconds, error, is_last) per page range
+
+        The page ranges of every file go through one bounded, ordered
+        process stream, so only a few ranges are in flight at a time.
+        """
+        def tasks():
+            for pdf_file in pdf_files:
+                try:
+                    ranges = page_ranges(count_pages(pdf_file, self.backends), self.chunk_size)
+                except Exception as e:
+                    yield pdf_file, None, str(e), True, None
+                    continue
+                if not ranges:
+                    yield pdf_file, None, None, True, None
+                for number, (start, end) in enumerate(ranges):
+                    yield (pdf_file, (start, end), None, number == len(ranges) - 1,
+                           self.backends)
+
+        processor = ParallelProcessor(workers)
+        yield from processor.process_stream(_batch_task, tasks(), chunk_size=1)
+
+    def _iter_guarded(self, pdf_files, workers, skipped):
+        """
+        Yield (pdf_file, page texts, seconds, failure, is_last) per file
+
+        Files arrive whole in completion order; skipped pages are recorded
+        in the skipped dict.
+        """
+        for pdf_file, texts, seconds, failure, skipped_pages in iter_guarded(
+                pdf_files, self.backends, workers, self.page_timeout, self.file_timeout,
+                self.memory_limit, self.skip_bad_pages):
+            if skipped_pages:
+                skipped[pdf_file] = skipped_pages
+            yield pdf_file, texts, seconds, failure, True
 
-        log.info(f"Batch extraction complete: {len(results)} files")
-        return results
@@ -0,0 +1,276 @@
+"""Isolated PDF extraction with time and memory limits"""
+import os
+import time
+from collections import deque
+from multiprocessing import Pipe, Process
+from multiprocessing.connection import wait
+from common.logger import log
+
+FAILURE_REASONS = ('page_timeout', 'file_timeout', 'memory', 'crashed', 'error')
+
+_PAGE_SIZE = os.sysconf('SC_PAGE_SIZE') if hasattr(os, 'sysconf') else 4096
+
+
+def extraction_failure(reason, message, page=None):
+    """
+    Structured description of a failed extraction
+
+    Args:
+        reason: One of FAILURE_REASONS
+        message: Human-readable detail
+        page: 1-based page number the failure is attributed to, if known
+
+    Returns:
+        dict: reason, message and page
+    """
+    return {'reason': reason, 'message': message, 'page': page}
+
+
+def _rss_bytes(pid):
+    """Resident set size of a process, or None where /proc is unavailable"""
+    try:
+        with open(f"/proc/{pid}/statm") as f:
+            return int(f.read().split()[1]) * _PAGE_SIZE
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+class GuardedExtractionError(RuntimeError):
+    """A streamed guarded extraction failed; failure holds the structured reason"""
+
+    def __init__(self, pdf_path, failure):
+        super().__init__(f"{pdf_path}: {failure['reason']} at page {failure['page']}: "
+                         f"{failure['message']}")
+        self.failure = failure
+
+
+def _guarded_worker(conn, pdf_path, start, backends, method='iter_pages'):
+    """Stream per-page results from start onwards over conn (runs in its own process)"""
+    from extract.pdf_extractor import iter_page_blocks, iter_page_texts
+
+    pages = iter_page_blocks if method == 'iter_blocks' else iter_page_texts
+    try:
+        for page in pages(pdf_path, backends, start):
+            conn.send(('page', page))
+        conn.send(('done', None))
+    except MemoryError:
+        conn.send(('failed', ('memory', 'MemoryError', False)))
+    except OSError as e:
+        # Unreadable file: retrying later pages cannot help
+        conn.send(('failed', ('error', str(e), False)))
+    except Exception as e:
+        conn.send(('failed', ('error', str(e), True)))
+    finally:
+        conn.close()
+
+
+class _GuardedJob:
+    """One file being extracted by a sequence of guarded worker processes"""
+
+    def __init__(self, pdf_file, method='iter_pages'):
+        self.pdf_file = pdf_file
+        self.method = method
+        self.texts = []
+        self.received = 0
+        self.skipped_pages = []
+        self.started = time.perf_counter()
+        self.process = None
+        self.conn = None
+        self.last_progress = None
+
+    @property
+    def next_page(self):
+        return self.received + len(self.skipped_pages)
+
+    def spawn(self, backends):
+        receiver, sender = Pipe(duplex=False)
+        self.process = Process(target=_guarded_worker,
+                               args=(sender, self.pdf_file, self.next_page, backends,
+                                     self.method),
+                               daemon=True)
+        self.process.start()
+        sender.close()
+        self.conn = receiver
+        self.last_progress = time.perf_counter()
+
+    def kill(self):
+        if self.process.is_alive():
+            self.process.kill()
+        self.process.join()
+        self.conn.close()
+
+    def limit_failure(self, page_timeout, file_timeout, memory_limit):
+        """Failure dict if the worker is over a time or memory limit, else None"""
+        now = time.perf_counter()
+        if file_timeout is not None and now - self.started > file_timeout:
+            return extraction_failure('file_timeout', f"exceeded {file_timeout}s",
+                                      self.next_page + 1)
+        if (page_timeout is not None and now - self.last_progress > page_timeout
+                and not self.conn.poll()):
+            return extraction_failure('page_timeout', f"no progress for {page_timeout}s",
+                                      self.next_page + 1)
+        if memory_limit is not None:
+            rss = _rss_bytes(self.process.pid)
+            if rss is not None and rss > memory_limit:
+                return extraction_failure('memory', f"RSS {rss} bytes over limit {memory_limit}",
+                                          self.next_page + 1)
+        return None
+
+    def can_skip(self, failure, skip_bad_pages, max_bad_pages, page_specific=True):
+        return (skip_bad_pages and page_specific
+                and failure['reason'] in ('page_timeout', 'crashed', 'error')
+                and len(self.skipped_pages) < max_bad_pages)
+
+
+def iter_guarded(pdf_files, backends, workers=1, page_timeout=60, file_timeout=None,
+                 memory_limit=None, skip_bad_pages=False, max_bad_pages=10, poll_interval=0.1):
+    """
+    Extract files in separate processes, killing those that exceed limits
+
+    Each file runs in its own worker process that streams pages back, so
+    the parent can enforce a per-page time limit (no page for
+    page_timeout seconds), an overall per-file deadline and a resident
+    memory ceiling, and survives workers that crash. With skip_bad_pages,
+    a page that times out, crashes the worker or fails is recorded and a
+    fresh worker resumes after it; otherwise the file fails.
+
+    Args:
+        pdf_files: PDF paths
+        backends: Backend names, primary first
+        workers: Files extracted concurrently
+        page_timeout: Seconds allowed per page (None: unlimited)
+        file_timeout: Seconds allowed per file (None: unlimited)
+        memory_limit: Worker RSS ceiling in bytes (None: unlimited; needs /proc)
+        skip_bad_pages: Skip failing pages instead of failing the file
+        max_bad_pages: Skipped pages after which the file fails anyway
+        poll_interval: Seconds between limit checks
+
+    Yields:
+        tuple: (pdf_file, page texts, seconds, failure dict or None,
+            skipped page numbers), in completion order
+    """
+    pending = deque(pdf_files)
+    active = {}
+
+    def finish(job, failure=None):
+        job.kill()
+        del active[job.conn]
+        seconds = time.perf_counter() - job.started
+        return job.pdf_file, job.texts, seconds, failure, job.skipped_pages
+
+    def page_failed(job, failure, page_specific=True):
+        """Skip the failing page and respawn, or fail the file"""
+        if not job.can_skip(failure, skip_bad_pages, max_bad_pages, page_specific):
+            return finish(job, failure)
+
+        log.warning(f"Skipping page {failure['page']} of {job.pdf_file}: {failure['message']}")
+        job.kill()
+        del active[job.conn]
+        job.skipped_pages.append(failure['page'])
+        job.spawn(backends)
+        active[job.conn] = job
+        return None
+
+    while pending or active:
+        while pending and len(active) < workers:
+            job = _GuardedJob(pending.popleft())
+            job.spawn(backends)
+            active[job.conn] = job
+
+        for conn in wait(list(active), timeout=poll_interval):
+            job = active[conn]
+            try:
+                kind, payload = conn.recv()
+            except (EOFError, OSError):
+                job.process.join()
+                result = page_failed(job, extraction_failure(
+                    'crashed', f"worker exited with code {job.process.exitcode}",
+                    job.next_page + 1))
+            else:
+                if kind == 'page':
+                    job.texts.append(payload)
+                    job.received += 1
+                    job.last_progress = time.perf_counter()
+                    continue
+                if kind == 'done':
+                    result = finish(job)
+                else:
+                    reason, message, page_specific = payload
+                    result = page_failed(job, extraction_failure(reason, message, job.next_page + 1),
+                                         page_specific)
+            if result is not None:
+                yield result
+
+        for job in list(active.values()):
+            failure = job.limit_failure(page_timeout, file_timeout, memory_limit)
+            if failure is not None:
+                result = page_failed(job, failure)
+                if result is not None:
+                    yield result
+
+
+def iter_guarded_pages(pdf_path, backends, method='iter_pages', page_timeout=60,
+                       file_timeout=None, memory_limit=None, skip_bad_pages=False,
+                       max_bad_pages=10, poll_interval=0.1):
+    """
+    Stream one file's pages from a killable worker process
+
+    The limits are those of iter_guarded, but pages are yielded as the
+    worker sends them instead of once the file is done, so the caller
+    holds O(one page).
+
+    Args:
+        pdf_path: Path to PDF file
+        backends: Backend names, primary first
+        method: 'iter_pages' for page texts or 'iter_blocks' for layout blocks
+        page_timeout, file_timeout, memory_limit, skip_bad_pages,
+            max_bad_pages, poll_interval: See iter_guarded
+
+    Yields:
+        tuple: (page_number, page), page numbers starting at 1; skipped
+            pages are left out
+
+    Raises:
+        GuardedExtractionError: When the file fails
+    """
+    job = _GuardedJob(pdf_path, method)
+    job.spawn(backends)
+
+    def page_failed(failure, page_specific=True):
+        job.kill()
+        if not job.can_skip(failure, skip_bad_pages, max_bad_pages, page_specific):
+            raise GuardedExtractionError(pdf_path, failure)
+        log.warning(f"Skipping page {failure['page']} of {pdf_path}: {failure['message']}")
+        job.skipped_pages.append(failure['page'])
+        job.spawn(backends)
+
+    try:
+        while True:
+            if job.conn.poll(poll_interval):
+                try:
+                    kind, payload = job.conn.recv()
+                except (EOFError, OSError):
+                    job.process.join()
+                    page_failed(extraction_failure(
+                        'crashed', f"worker exited with code {job.process.exitcode}",
+                        job.next_page + 1))
+                    continue
+                if kind == 'page':
+                    job.received += 1
+                    job.last_progress = time.perf_counter()
+                    yield job.next_page, payload
+                    # Time spent by the consumer is not the page's fault
+                    job.last_progress = time.perf_counter()
+                    continue
+                if kind == 'done':
+                    return
+                reason, message, page_specific = payload
+                page_failed(extraction_failure(reason, message, job.next_page + 1),
+                            page_specific)
+                continue
+
+            failure = job.limit_failure(page_timeout, file_timeout, memory_limit)
+            if failure is not None:
+                page_failed(failure)
+    finally:
+        job.kill()
@@ -0,0 +1,299 @@
+"""Near-duplicate detection with MinHash signatures and an LSH band index"""
+import json
+import numpy as np
+from common.logger import log
+
+_SHIFT32 = np.uint64(32)
+
+
+class MinHasher:
+    """
+    Vectorized MinHash over byte shingles
+
+    Shingles are hashed with a rolling polynomial over the utf-8 bytes of
+    the lowercased text, and each of num_perm permutations is a
+    multiply-shift hash, so a whole document is signed with a few NumPy
+    array operations. Shingle hashes are processed in blocks to keep the
+    num_perm x shingles intermediate bounded.
+    """
+
+    def __init__(self, num_perm=128, shingle_size=9, seed=42, block_size=8192):
+        """
+        Initialize hasher
+
+        Args:
+            num_perm: Signature length
+            shingle_size: Bytes per shingle
+            seed: Random seed; signatures are only comparable for equal seeds
+            block_size: Shingles hashed per block
+        """
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        self.seed = seed
+        self.block_size = block_size
+
+        rng = np.random.default_rng(seed)
+        self._a = rng.integers(1, 2 ** 63, size=num_perm, dtype=np.uint64) | np.uint64(1)
+        self._b = rng.integers(0, 2 ** 63, size=num_perm, dtype=np.uint64)
+        with np.errstate(over='ignore'):
+            self._powers = np.uint64(1099511628211) ** np.arange(
+                shingle_size - 1, -1, -1, dtype=np.uint64)
+
+    def shingle_hashes(self, text):
+        """Return the unique 64-bit shingle hashes of text"""
+        data = np.frombuffer(text.lower().encode('utf-8', errors='ignore'), dtype=np.uint8)
+        if len(data) < self.shingle_size:
+            data = np.pad(data, (0, self.shingle_size - len(data)))
+
+        data = data.astype(np.uint64)
+        count = len(data) - self.shingle_size + 1
+        hashes = np.zeros(count, dtype=np.uint64)
+        with np.errstate(over='ignore'):
+            for offset, power in enumerate(self._powers):
+                hashes += data[offset:offset + count] * power
+        return np.unique(hashes)
+
+    def signature(self, text):
+        """
+        Compute the MinHash signature of text
+
+        Args:
+            text: Cleaned document text
+
+        Returns:
+            np.ndarray: uint32 array of length num_perm
+        """
+        hashes = self.shingle_hashes(text)
+        signature = np.full(self.num_perm, np.iinfo(np.uint32).max, dtype=np.uint32)
+
+        with np.errstate(over='ignore'):
+            for start in range(0, len(hashes), self.block_size):
+                block = hashes[start:start + self.block_size]
+                permuted = (self._a[:, None] * block[None, :] + self._b[:, None]) >> _SHIFT32
+                np.minimum(signature, permuted.min(axis=1).astype(np.uint32), out=signature)
+
+        return signature
+
+
+class NearDuplicateIndex:
+    """
+    Fixed-capacity LSH index of MinHash signatures
+
+    Signatures are split into bands; documents sharing any band bucket are
+    candidates, and candidates are confirmed by estimated Jaccard
+    similarity. Storage is a ring buffer of `capacity` slots, so memory is
+    bounded and the oldest documents are forgotten first; the arrays start
+    at initial_capacity slots and double as documents arrive, so a small
+    corpus does not pay for the full capacity. The index can be saved and
+    loaded so incremental runs only compare new documents.
+    """
+
+    def __init__(self, num_perm=128, bands=16, threshold=0.8, capacity=100_000,
+                 shingle_size=9, seed=42, initial_capacity=1024):
+        """
+        Initialize index
+
+        Args:
+            num_perm: Signature length (must be divisible by bands)
+            bands: Number of LSH bands
+            threshold: Minimum estimated Jaccard similarity for a duplicate
+            capacity: Maximum number of indexed documents
+            shingle_size: Bytes per shingle
+            seed: MinHash seed
+            initial_capacity: Slots allocated up front (set to the
+                expected document count to avoid regrowing)
+        """
+        if num_perm % bands:
+            raise ValueError(f"num_perm ({num_perm}) must be divisible by bands ({bands})")
+
+        self.hasher = MinHasher(num_perm, shingle_size, seed)
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.threshold = threshold
+        self.capacity = capacity
+
+        rows = max(1, min(initial_capacity, capacity))
+        self.signatures = np.zeros((rows, num_perm), dtype=np.uint32)
+        self.band_keys = np.zeros((rows, bands), dtype=np.uint64)
+        self.doc_ids = []
+        self.size = 0
+        self.next_slot = 0
+        self._buckets = [{} for _ in range(bands)]
+        self._band_mix = np.random.default_rng(seed + 1).integers(
+            1, 2 ** 63, size=self.rows, dtype=np.uint64) | np.uint64(1)
+
+    def _reserve(self, rows):
+        """Grow the slot arrays to hold at least rows documents (up to capacity)"""
+        allocated = len(self.signatures)
+        if rows <= allocated:
+            return
+        grown = min(self.capacity, max(rows, 2 * allocated))
+        for name in ('signatures', 'band_keys'):
+            old = getattr(self, name)
+            new = np.zeros((grown, old.shape[1]), dtype=old.dtype)
+            new[:allocated] = old
+            setattr(self, name, new)
+
+    def _band_keys(self, signature):
+        with np.errstate(over='ignore'):
+            return (signature.reshape(self.bands, self.rows).astype(np.uint64)
+                    * self._band_mix).sum(axis=1)
+
+    def query(self, signature):
+        """
+        Find the most similar indexed document above threshold
+
+        Args:
+            signature: MinHash signature from self.hasher
+
+        Returns:
+            tuple: (doc_id, similarity) or (None, 0.0)
+        """
+        keys = self._band_keys(signature)
+        candidates = set()
+        for band, key in enumerate(keys.tolist()):
+            slots = self._buckets[band].get(key)
+            if slots:
+                candidates.update(slots)
+
+        if not candidates:
+            return None, 0.0
+
+        slots = np.fromiter(candidates, dtype=np.int64)
+        similarity = (self.signatures[slots] == signature).mean(axis=1)
+        best = int(similarity.argmax())
+        if similarity[best] >= self.threshold:
+            return self.doc_ids[slots[best]], float(similarity[best])
+        return None, 0.0
+
+    def add(self, doc_id, signature):
+        """Index a signature, evicting the oldest document when full"""
+        slot = self.next_slot
+        if self.size == self.capacity:
+            self._unlink(slot)
+            self.doc_ids[slot] = doc_id
+        else:
+            self._reserve(slot + 1)
+            self.doc_ids.append(doc_id)
+
+        keys = self._band_keys(signature)
+        self.signatures[slot] = signature
+        self.band_keys[slot] = keys
+        self._link(slot, keys)
+
+        self.next_slot = (slot + 1) % self.capacity
+        self.size = min(self.size + 1, self.capacity)
+
+    def _link(self, slot, keys):
+        for band, key in enumerate(keys.tolist()):
+            self._buckets[band].setdefault(key, []).append(slot)
+
+    def _unlink(self, slot):
+        for band, key in enumerate(self.band_keys[slot].tolist()):
+            bucket = self._buckets[band].get(key)
+            if bucket:
+                bucket.remove(slot)
+                if not bucket:
+                    del self._buckets[band][key]
+
+    def check(self, doc_id, text, add=True):
+        """
+        Check text against the index and optionally add it
+
+        Args:
+            doc_id: Identifier recorded for this document
+            text: Cleaned document text
+            add: Index the document when it is not a duplicate
+
+        Returns:
+            tuple: (duplicate_of, similarity); duplicate_of is None if unique
+        """
+        signature = self.hasher.signature(text)
+        duplicate_of, similarity = self.query(signature)
+        if duplicate_of is None and add:
+            self.add(doc_id, signature)
+        return duplicate_of, similarity
+
+    def save(self, path):
+        """
+        Persist the index to a .npz file
+
+        Document ids are stored as JSON, so ints, strings, floats, bools and
+        None keep their type across save() and load().
+
+        Raises:
+            TypeError: If a document id is not JSON-serializable
+        """
+        np.savez_compressed(
+            path,
+            params=np.array([self.hasher.num_perm, self.bands, self.capacity,
+                             self.hasher.shingle_size, self.hasher.seed,
+                             self.next_slot, self.size], dtype=np.int64),
+            threshold=np.array(self.threshold),
+            signatures=self.signatures[:self.size],
+            doc_ids=np.array(json.dumps(self.doc_ids)),
+        )
+        log.info(f"Saved near-duplicate index ({self.size} documents) to {path}")
+
+    @classmethod
+    def load(cls, path):
+        """Load an index written by save()"""
+        with np.load(path) as data:
+            num_perm, bands, capacity, shingle_size, seed, next_slot, size = data['params'].tolist()
+            index = cls(num_perm, bands, float(data['threshold']), capacity, shingle_size, seed,
+                        initial_capacity=size)
+            index.doc_ids = json.loads(data['doc_ids'].item())
+            for slot, signature in enumerate(data['signatures']):
+                keys = index._band_keys(signature)
+                index.signatures[slot] = signature
+                index.band_keys[slot] = keys
+                index._link(slot, keys)
+            index.next_slot = next_slot
+            index.size = size
+
+        log.info(f"Loaded near-duplicate index ({index.size} documents) from {path}")
+        return index
+
+
+def dedup_documents(documents, index=None, mode='drop', id_key='id'):
+    """
+    Stream documents through a near-duplicate index
+
+    Args:
+        documents: Iterable of dicts with 'content' key (already cleaned)
+        index: NearDuplicateIndex to use and update (default: a new one)
+        mode: 'drop' to skip duplicates or 'flag' to yield them with
+            'duplicate_of' and 'similarity' set
+        id_key: Document key used as the index identifier
+
+    Yields:
+        dict: Unique documents (and flagged duplicates in 'flag' mode)
+    """
+    if mode not in ('drop', 'flag'):
+        raise ValueError(f"Unknown dedup mode: {mode}")
+
+    index = index or NearDuplicateIndex()
+    seen = 0
+    duplicates = 0
+
+    for position, document in enumerate(documents):
+        content = document.get('content') if document else None
+        if not content:
+            yield document
+            continue
+
+        seen += 1
+        doc_id = document.get(id_key, position)
+        duplicate_of, similarity = index.check(doc_id, content)
+
+        if duplicate_of is None:
+            yield document
+            continue
+
+        duplicates += 1
+        if mode == 'flag':
+            document['duplicate_of'] = duplicate_of
+            document['similarity'] = similarity
+            yield document
+
+    log.info(f"Dedup: {duplicates} near-duplicates in {seen} documents")
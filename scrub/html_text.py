@@ -0,0 +1,132 @@
+"""HTML-aware text extraction for the scrub stage"""
+from html.parser import HTMLParser
+
+# Elements whose content is never text
+SKIP_TAGS = frozenset({'script', 'style', 'noscript', 'template'})
+
+# Elements dropped outright when boilerplate removal is enabled
+BOILERPLATE_TAGS = frozenset({'nav', 'footer', 'aside'})
+
+# Elements that start a new text block
+BLOCK_TAGS = frozenset({
+    'address', 'article', 'aside', 'blockquote', 'body', 'br', 'dd', 'div',
+    'dl', 'dt', 'fieldset', 'figcaption', 'figure', 'footer', 'form', 'h1',
+    'h2', 'h3', 'h4', 'h5', 'h6', 'header', 'hr', 'li', 'main', 'nav', 'ol',
+    'p', 'pre', 'section', 'table', 'td', 'th', 'title', 'tr', 'ul',
+})
+
+
+class HTMLTextExtractor(HTMLParser):
+    """
+    Incremental HTML to text converter
+
+    Drops script/style/noscript bodies and comments, decodes entities and
+    emits one line per block element. With remove_boilerplate, nav/footer/
+    aside elements and blocks whose text is mostly link text are dropped
+    as they are closed, so only the current block is ever buffered.
+
+    Can be fed in chunks; completed text is drained with pop_text().
+    """
+
+    def __init__(self, remove_boilerplate=False, max_link_density=0.5):
+        """
+        Initialize extractor
+
+        Args:
+            remove_boilerplate: Drop navigation/footer blocks
+            max_link_density: Link text / block text ratio above which a
+                block is treated as boilerplate
+        """
+        super().__init__(convert_charrefs=True)
+        self.remove_boilerplate = remove_boilerplate
+        self.max_link_density = max_link_density
+        self._skip_depth = 0
+        self._link_depth = 0
+        self._block = []
+        self._block_chars = 0
+        self._link_chars = 0
+        self._output = []
+
+    def _skips(self, tag):
+        return tag in SKIP_TAGS or (self.remove_boilerplate and tag in BOILERPLATE_TAGS)
+
+    def _end_block(self):
+        if not self._block:
+            return
+
+        keep = True
+        if self.remove_boilerplate and self._block_chars:
+            keep = self._link_chars / self._block_chars <= self.max_link_density
+
+        if keep:
+            text = ''.join(self._block)
+            if not text.isspace():
+                self._output.append(text)
+                self._output.append('\n')
+
+        self._block = []
+        self._block_chars = 0
+        self._link_chars = 0
+
+    def handle_starttag(self, tag, attrs):
+        if self._skips(tag):
+            self._skip_depth += 1
+        elif tag == 'a':
+            self._link_depth += 1
+
+        if tag in BLOCK_TAGS:
+            self._end_block()
+
+    def handle_endtag(self, tag):
+        if self._skips(tag):
+            self._skip_depth = max(self._skip_depth - 1, 0)
+        elif tag == 'a':
+            self._link_depth = max(self._link_depth - 1, 0)
+
+        if tag in BLOCK_TAGS:
+            self._end_block()
+
+    def handle_data(self, data):
+        if self._skip_depth:
+            return
+
+        self._block.append(data)
+        if self.remove_boilerplate:
+            # Non-whitespace only, so the count does not depend on how the
+            # parser split the text
+            length = sum(map(len, data.split()))
+            self._block_chars += length
+            if self._link_depth:
+                self._link_chars += length
+
+    def pop_text(self):
+        """Return text completed so far and release it"""
+        text = ''.join(self._output)
+        self._output = []
+        return text
+
+    def close(self):
+        """Flush buffered input and the trailing block"""
+        super().close()
+        self._end_block()
+
+
+def strip_html(text, remove_boilerplate=False, max_link_density=0.5):
+    """
+    Convert HTML to plain text
+
+    Args:
+        text: HTML content
+        remove_boilerplate: Drop navigation/footer boilerplate
+        max_link_density: Link density threshold for boilerplate blocks
+
+    Returns:
+        str: Extracted text, one line per block
+    """
+    if not text:
+        return ''
+
+    extractor = HTMLTextExtractor(remove_boilerplate, max_link_density)
+    extractor.feed(text)
+    extractor.close()
+    return extractor.pop_text()
@@ -0,0 +1,385 @@
+"""Declarative scrub rules compiled into a small number of regex passes"""
+import json
+import re
+from functools import lru_cache
+try:
+    from re import _parser as sre_parse
+except ImportError:  # pragma: no cover - Python < 3.11
+    import sre_parse
+from common.logger import log
+from common.result_cache import content_hash
+from common.yaml_config import load_yaml
+
+RULE_KINDS = ('strip', 'replace', 'collapse', 'keep', 'trim')
+
+# Kinds whose consecutive rules may be merged into a single alternation pass
+MERGEABLE_KINDS = ('strip', 'replace', 'collapse')
+
+# Categories whose members never overlap: \d and \w share digits
+_DISJOINT_CATEGORIES = {frozenset('ds'), frozenset('sw')}
+_CATEGORY_RE = {category: re.compile(f"\\{category}") for category in 'dsw'}
+
+
+def rule_kind(rule):
+    """Return the kind of a rule dict, e.g. {'strip': '<[^>]*>'} -> 'strip'"""
+    kinds = [kind for kind in RULE_KINDS if kind in rule]
+    if len(kinds) != 1:
+        raise ValueError(f"Rule must have exactly one of {RULE_KINDS}: {rule}")
+    if kinds[0] == 'trim' and not isinstance(rule['trim'], bool):
+        raise ValueError(f"trim must be true or false: {rule}")
+    return kinds[0]
+
+
+def rules_fingerprint(rules):
+    """Stable fingerprint of a rule list"""
+    return content_hash(json.dumps(rules, sort_keys=True))
+
+
+class ScrubProgram:
+    """
+    Compiled scrub rule set
+
+    Rules are applied in order. Consecutive strip, replace or collapse
+    rules of one kind are merged into one regex alternation, applied in a
+    single pass, when that cannot change the result: their matches use
+    disjoint characters, cannot be empty or depend on context
+    (assertions, backreferences), no replacement produces a later rule's
+    characters, and a later rule cannot match across text an earlier one
+    removed. Other rules run as separate passes.
+
+        strip: pattern            remove every match
+        replace: pattern, with    substitute matches
+        collapse: pattern, with   replace each run of matches (default ' ')
+        keep: char class body     drop every character outside the class
+        trim: true                strip leading/trailing whitespace (false: no-op)
+
+    Patterns must not use numbered groups or backreferences, since merged
+    passes renumber them.
+    """
+
+    def __init__(self, rules):
+        self.rules = rules
+        self.fingerprint = rules_fingerprint(rules)
+        self.passes = self._compile(rules)
+
+    def __reduce__(self):
+        # Compiled passes are closures; rebuild from the rules when pickled
+        return compile_rules, (self.rules,)
+
+    def _compile(self, rules):
+        groups = []
+        for rule in rules:
+            kind = rule_kind(rule)
+            if kind == 'trim' and not rule['trim']:
+                continue
+            if (groups and kind in MERGEABLE_KINDS and groups[-1][0] == kind
+                    and all(_independent(earlier, rule, kind) for earlier in groups[-1][1])):
+                groups[-1][1].append(rule)
+            else:
+                groups.append((kind, [rule]))
+
+        passes = []
+        index = 0
+        while index < len(groups):
+            kind, group = groups[index]
+            following = groups[index + 1][0] if index + 1 < len(groups) else None
+
+            if (kind == 'collapse' and following == 'trim' and len(group) == 1
+                    and group[0]['collapse'] in (r'\s', r'\s+')
+                    and group[0].get('with', ' ') == ' '):
+                # str.split() uses the same whitespace definition as \s
+                passes.append(_split_join)
+                index += 2
+                continue
+
+            passes.append(self._compile_group(kind, group))
+            index += 1
+
+        return passes
+
+    def _compile_group(self, kind, group):
+        if kind == 'trim':
+            return str.strip
+        if kind == 'keep':
+            return _compile_keep(group[0]['keep'])
+
+        if kind == 'strip':
+            patterns = [rule['strip'] for rule in group]
+            replacements = [''] * len(group)
+        elif kind == 'replace':
+            patterns = [rule['replace'] for rule in group]
+            replacements = [rule['with'] for rule in group]
+        else:
+            patterns = [f"(?:{rule['collapse']})+" for rule in group]
+            replacements = [rule.get('with', ' ') for rule in group]
+
+        if len(set(replacements)) == 1:
+            # One replacement for every alternative: plain C-level substitution
+            regex = re.compile(_guard(patterns, '|'.join(f"(?:{p})" for p in patterns)))
+            replacement = replacements[0].replace('\\', '\\\\')
+            return lambda text: regex.sub(replacement, text)
+
+        # Named groups hide the leading characters from the regex
+        # optimizer, so always try to add an explicit guard
+        regex = re.compile(_guard(patterns, '|'.join(
+            f"(?P<r{i}>{p})" for i, p in enumerate(patterns)
+        ), force=True))
+        lookup = {f"r{i}": r for i, r in enumerate(replacements)}
+        return lambda text: regex.sub(lambda m: lookup[m.lastgroup], text)
+
+    def apply(self, text):
+        """
+        Run the program over text
+
+        Args:
+            text: Input text
+
+        Returns:
+            str: Scrubbed text
+        """
+        if not text:
+            return ''
+
+        for step in self.passes:
+            text = step(text)
+        return text
+
+
+def _effective_pattern(rule, kind):
+    """Pattern and replacement a strip/replace/collapse rule applies"""
+    if kind == 'strip':
+        return rule['strip'], ''
+    if kind == 'replace':
+        return rule['replace'], rule['with']
+    return f"(?:{rule['collapse']})+", rule.get('with', ' ')
+
+
+def _match_chars(items):
+    """
+    Characters a parsed pattern can consume, or None if unknown
+
+    Returns a (chars, categories) pair, categories drawn from 'd', 's'
+    and 'w'. Assertions, negations, '.' and backreferences give None, as
+    their matches depend on context or are unbounded.
+    """
+    chars = set()
+    categories = set()
+    for op, arg in items:
+        name = str(op)
+        if name == 'LITERAL':
+            chars.add(chr(arg))
+        elif name == 'IN':
+            for item_op, item_arg in arg:
+                item_name = str(item_op)
+                if item_name == 'LITERAL':
+                    chars.add(chr(item_arg))
+                elif item_name == 'RANGE' and item_arg[1] - item_arg[0] < 256:
+                    chars.update(map(chr, range(item_arg[0], item_arg[1] + 1)))
+                elif item_name == 'CATEGORY' and str(item_arg) in (
+                        'CATEGORY_DIGIT', 'CATEGORY_SPACE', 'CATEGORY_WORD'):
+                    categories.add(str(item_arg)[9].lower())
+                else:
+                    return None
+        elif name == 'SUBPATTERN':
+            found = _match_chars(arg[-1])
+            if found is None:
+                return None
+            chars |= found[0]
+            categories |= found[1]
+        elif name == 'BRANCH':
+            for branch in arg[1]:
+                found = _match_chars(branch)
+                if found is None:
+                    return None
+                chars |= found[0]
+                categories |= found[1]
+        elif name in ('MAX_REPEAT', 'MIN_REPEAT', 'POSSESSIVE_REPEAT', 'ATOMIC_GROUP'):
+            found = _match_chars(arg[2] if name != 'ATOMIC_GROUP' else arg)
+            if found is None:
+                return None
+            chars |= found[0]
+            categories |= found[1]
+        else:
+            return None
+    return chars, categories
+
+
+def _contains(char_set, char):
+    chars, categories = char_set
+    return char in chars or any(_CATEGORY_RE[c].match(char) for c in categories)
+
+
+def _disjoint(first, second):
+    if first[0] & second[0]:
+        return False
+    if any(_contains(second, char) for char in first[0]):
+        return False
+    if any(_contains(first, char) for char in second[0]):
+        return False
+    return all(a != b and frozenset((a, b)) in _DISJOINT_CATEGORIES
+               for a in first[1] for b in second[1])
+
+
+def _analyze(pattern):
+    """(char set, min width, max width) of a pattern, or None if unknown"""
+    try:
+        parsed = sre_parse.parse(pattern)
+    except (re.error, AttributeError, TypeError):
+        return None
+    if parsed.state.flags & (re.IGNORECASE | re.VERBOSE):
+        return None
+    char_set = _match_chars(list(parsed))
+    if char_set is None:
+        return None
+    low, high = parsed.getwidth()
+    return char_set, low, high
+
+
+def _independent(earlier, later, kind):
+    """
+    Whether applying earlier then later equals one merged pass
+
+    Sequential application can differ when matches of the two rules
+    compete for the same characters, when earlier's replacement contains
+    characters later matches, or when removing earlier's matches joins
+    text into a new match of later.
+    """
+    earlier_pattern, earlier_with = _effective_pattern(earlier, kind)
+    later_pattern, _ = _effective_pattern(later, kind)
+    first = _analyze(earlier_pattern)
+    second = _analyze(later_pattern)
+    if first is None or second is None or first[1] == 0 or second[1] == 0:
+        return False
+    if not _disjoint(first[0], second[0]):
+        return False
+    if any(_contains(second[0], char) for char in earlier_with):
+        return False
+    # A later match can only span a removal point if it is wider than one
+    # character; a non-empty replacement without its characters blocks it
+    return bool(earlier_with) or second[2] <= 1
+
+
+def _first_chars(items):
+    """Set of characters a parsed pattern can start with, or None if unbounded"""
+    for op, arg in items:
+        name = str(op)
+        if name == 'AT':
+            continue
+        if name == 'LITERAL':
+            return {chr(arg)}
+        if name == 'IN':
+            chars = set()
+            for item_op, item_arg in arg:
+                item_name = str(item_op)
+                if item_name == 'LITERAL':
+                    chars.add(chr(item_arg))
+                elif item_name == 'RANGE' and item_arg[1] - item_arg[0] < 64:
+                    chars.update(map(chr, range(item_arg[0], item_arg[1] + 1)))
+                else:
+                    return None
+            return chars
+        if name == 'SUBPATTERN':
+            return _first_chars(arg[-1])
+        if name == 'BRANCH':
+            chars = set()
+            for branch in arg[1]:
+                branch_chars = _first_chars(branch)
+                if branch_chars is None:
+                    return None
+                chars |= branch_chars
+            return chars
+        if name in ('MAX_REPEAT', 'MIN_REPEAT', 'POSSESSIVE_REPEAT') and arg[0] >= 1:
+            return _first_chars(arg[2])
+        return None
+    return None
+
+
+def _guard(patterns, combined, force=False):
+    """
+    Prefix combined with a lookahead on its possible first characters
+
+    sre only skips ahead quickly when a pattern visibly starts with a
+    literal or character set; zero-width assertions such as \\b and named
+    groups defeat that, so the guard is added for those.
+    """
+    chars = set()
+    needs_guard = force
+    for pattern in patterns:
+        try:
+            parsed = sre_parse.parse(pattern)
+        except (re.error, AttributeError, TypeError):
+            return combined
+        if parsed.state.flags & re.IGNORECASE:
+            return combined
+
+        first = _first_chars(list(parsed))
+        if first is None or len(chars | first) > 32:
+            return combined
+        chars |= first
+        needs_guard = needs_guard or (len(parsed) and str(parsed[0][0]) == 'AT')
+
+    if not needs_guard or not chars:
+        return combined
+    return f"(?=[{''.join(re.escape(c) for c in sorted(chars))}])(?:{combined})"
+
+
+def _split_join(text):
+    return ' '.join(text.split())
+
+
+def _compile_keep(char_class):
+    """Character whitelist filter with a bytes.translate path for ASCII input"""
+    regex = re.compile(f"[^{char_class}]+")
+    ascii_delete = bytes(c for c in range(128) if regex.match(chr(c)))
+
+    def keep(text):
+        if text.isascii():
+            return text.encode('ascii').translate(None, ascii_delete).decode('ascii')
+        return regex.sub('', text)
+
+    return keep
+
+
+def compile_rules(rules):
+    """
+    Compile a rule list, reusing the program for identical rule sets
+
+    Args:
+        rules: List of rule dicts
+
+    Returns:
+        ScrubProgram: Compiled program
+    """
+    return _compile_cached(json.dumps(rules, sort_keys=True))
+
+
+@lru_cache(maxsize=64)
+def _compile_cached(rules_json):
+    rules = json.loads(rules_json)
+    program = ScrubProgram(rules)
+    log.debug(f"Compiled {len(rules)} scrub rules into {len(program.passes)} passes")
+    return program
+
+
+def load_rules(file_path, source='default'):
+    """
+    Load a source's rule list from YAML
+
+    The file maps source names to rule lists; sources without their own
+    entry fall back to 'default'.
+
+    Args:
+        file_path: YAML rules file
+        source: Source name
+
+    Returns:
+        list: Rule dicts
+    """
+    rule_sets = load_yaml(file_path) or {}
+    rules = rule_sets.get(source, rule_sets.get('default'))
+    if rules is None:
+        raise KeyError(f"No scrub rules for source '{source}' in {file_path}")
+
+    for rule in rules:
+        rule_kind(rule)
+    return rules
@@ -0,0 +1,219 @@
+import asyncio
+import json
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+import unittest
+from pathlib import Path
+import numpy as np
+from aggregate.aggregate import DataAggregator
+from classify.artifact import CompactVocabulary, METADATA_FILE
+from classify.classify import DocumentClassifier
+from classify.serving import MicroBatcher
+from classify.streaming import labelled_batches
+from classify.train import TrainingPipeline
+
+TEXTS = [
+    "New smartphone release announced today",
+    "Stock market reaches all-time high",
+    "Local team wins championship game",
+    "Scientists discover new exoplanet",
+    "Recipe for homemade pasta",
+] * 4
+LABELS = ["tech", "finance", "sports", "science", "food"] * 4
+
+
+class TestBatchInference(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.classifier = DocumentClassifier()
+        cls.classifier.train(TEXTS, LABELS)
+
+    def test_matches_predict_and_proba(self):
+        result = self.classifier.predict_batch(iter(TEXTS), chunk_size=3, top_k=2)
+        np.testing.assert_array_equal(result['labels'], self.classifier.predict(TEXTS))
+        np.testing.assert_allclose(result['probabilities'], self.classifier.predict_proba(TEXTS))
+        np.testing.assert_array_equal(result['top_labels'][:, 0], result['labels'])
+        self.assertEqual(result['top_scores'].shape, (len(TEXTS), 2))
+        self.assertTrue((result['top_scores'][:, 0] >= result['top_scores'][:, 1]).all())
+
+    def test_chunks_and_empty_input(self):
+        batches = list(self.classifier.iter_predict_batches(TEXTS, chunk_size=8))
+        self.assertEqual([len(batch['labels']) for batch in batches], [8, 8, 4])
+
+        empty = self.classifier.predict_batch([])
+        self.assertEqual(empty['probabilities'].shape, (0, 5))
+        self.assertEqual(empty['top_labels'].shape, (0, 3))
+
+    def test_requires_training(self):
+        with self.assertRaises(ValueError):
+            DocumentClassifier().predict_batch(TEXTS)
+
+
+class TestStreamingTraining(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.files = []
+        for day in range(2):
+            path = Path(self.tmp.name) / f"day{day}.json"
+            records = [{'content': text, 'category': label} for text, label in zip(TEXTS, LABELS)]
+            records.append({'content': 'unlabelled document'})
+            path.write_text(json.dumps(records))
+            self.files.append(path)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_trains_from_json_files_and_resumes(self):
+        records = DataAggregator().iter_json_records(self.files[:1])
+        classifier = DocumentClassifier()
+        trained = classifier.train_stream(labelled_batches(records, batch_size=7),
+                                          classes=sorted(set(LABELS)), estimator='sgd')
+        self.assertEqual(trained, len(TEXTS))
+        np.testing.assert_array_equal(classifier.predict(TEXTS), LABELS)
+
+        model_path = Path(self.tmp.name) / 'model.joblib'
+        classifier.save_model(model_path)
+        resumed = DocumentClassifier()
+        resumed.load_model(model_path)
+        records = DataAggregator().iter_json_records(self.files[1:])
+        resumed.train_stream(labelled_batches(records), classes=sorted(set(LABELS)))
+        self.assertEqual(resumed.model.named_steps['tfidf'].n_samples_seen_, 2 * len(TEXTS))
+        np.testing.assert_array_equal(resumed.predict_batch(TEXTS)['labels'], LABELS)
+
+    def test_first_batch_needs_classes(self):
+        with self.assertRaises(ValueError):
+            DocumentClassifier().partial_train(TEXTS, LABELS)
+
+    def test_rejects_vocabulary_model(self):
+        classifier = DocumentClassifier()
+        classifier.train(TEXTS, LABELS)
+        with self.assertRaises(ValueError):
+            classifier.partial_train(TEXTS, LABELS)
+
+
+class TestParameterSearch(unittest.TestCase):
+    def setUp(self):
+        self.pipeline = TrainingPipeline()
+        self.pipeline.load_data(TEXTS * 3, LABELS * 3)
+
+    def test_grid_search_refits_best(self):
+        grid = {'tfidf__ngram_range': [(1, 1), (1, 2)], 'classifier__alpha': [0.01, 1.0]}
+        result = self.pipeline.search(grid, cv=3, n_jobs=2)
+
+        self.assertEqual(len(result['results']), 4)
+        self.assertEqual(result['results'][0]['params'], result['best_params'])
+        self.assertTrue(all(r['mean_fit_time'] > 0 for r in result['results']))
+        self.assertIsNone(self.pipeline.classifier.model.memory)
+        self.assertTrue(self.pipeline.classifier.is_trained)
+
+    def test_halving_search_keeps_cache_dir(self):
+        with tempfile.TemporaryDirectory() as cache_dir:
+            result = self.pipeline.search({'classifier__alpha': [0.01, 0.1, 1.0]},
+                                          method='halving', cv=3, cache_dir=cache_dir,
+                                          refit=False)
+            self.assertTrue(any(Path(cache_dir).iterdir()))
+        self.assertEqual(len(result['results']), 3)
+
+    def test_unknown_method(self):
+        with self.assertRaises(ValueError):
+            self.pipeline.search(method='bayes')
+
+
+class TestModelArtifact(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.classifier = DocumentClassifier()
+        cls.classifier.train(TEXTS, LABELS)
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.model_dir = Path(self.tmp.name) / 'model'
+        self.classifier.save_artifact(self.model_dir)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_round_trip_memory_maps_arrays(self):
+        for vocabulary, kind in (('compact', CompactVocabulary), ('dict', dict)):
+            loaded = DocumentClassifier()
+            metadata = loaded.load_artifact(self.model_dir, vocabulary=vocabulary)
+            self.assertIsInstance(loaded.model[0].vocabulary_, kind)
+            self.assertEqual(metadata['labels'], sorted(set(LABELS)))
+            self.assertEqual(loaded.trained_at, self.classifier.trained_at)
+            self.assertIsInstance(loaded.model[-1].feature_log_prob_, np.memmap)
+            np.testing.assert_allclose(loaded.predict_proba(TEXTS),
+                                       self.classifier.predict_proba(TEXTS))
+
+        self.assertIsInstance(self.classifier.model[0].vocabulary_, dict)
+
+    def test_load_model_accepts_artifact_directory(self):
+        loaded = DocumentClassifier()
+        loaded.load_model(self.model_dir)
+        self.assertIsInstance(loaded.model[0].vocabulary_, dict)
+        np.testing.assert_array_equal(loaded.predict(TEXTS), LABELS)
+
+    def test_metadata_checked_on_load(self):
+        metadata_path = self.model_dir / METADATA_FILE
+        metadata = json.loads(metadata_path.read_text())
+
+        metadata_path.write_text(json.dumps(dict(metadata, sklearn_version='0.1.0')))
+        with self.assertRaises(ValueError):
+            DocumentClassifier().load_artifact(self.model_dir)
+        DocumentClassifier().load_artifact(self.model_dir, strict_version=False)
+
+        metadata_path.write_text(json.dumps(dict(metadata, labels=['tech'])))
+        with self.assertRaises(ValueError):
+            DocumentClassifier().load_artifact(self.model_dir)
+
+        with self.assertRaises(ValueError):
+            DocumentClassifier().load_artifact(self.tmp.name)
+
+    def test_compact_vocabulary(self):
+        vocabulary = CompactVocabulary.from_dict({'café': 2, 'b': 0, 'a b': 1})
+        self.assertEqual(vocabulary['café'], 2)
+        self.assertNotIn('caf', vocabulary)
+        self.assertNotIn('cafés', vocabulary)
+        self.assertEqual(vocabulary.to_dict(), {'café': 2, 'b': 0, 'a b': 1})
+
+
+class TestMicroBatcher(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.classifier = DocumentClassifier()
+        cls.classifier.train(TEXTS, LABELS)
+
+    def test_concurrent_requests_are_batched(self):
+        with MicroBatcher(self.classifier, max_batch_size=8, max_wait=0.05) as batcher:
+            with ThreadPoolExecutor(max_workers=8) as pool:
+                labels = list(pool.map(batcher.predict, TEXTS * 2))
+
+        self.assertEqual(labels, LABELS * 2)
+        stats = batcher.stats()
+        self.assertEqual(stats['requests'], len(TEXTS) * 2)
+        self.assertLess(stats['batches'], len(TEXTS) * 2)
+        self.assertEqual(sum(size * count for size, count in stats['batch_size_histogram'].items()),
+                         stats['requests'])
+        self.assertLessEqual(max(stats['batch_size_histogram']), 8)
+        self.assertIn('p99', stats['latency_ms'])
+
+    def test_async_and_deadline_flush(self):
+        async def classify(batcher):
+            return await asyncio.gather(*(batcher.predict_async(text) for text in TEXTS[:3]))
+
+        with MicroBatcher(self.classifier, max_batch_size=64, max_wait=0.01) as batcher:
+            self.assertEqual(asyncio.run(classify(batcher)), LABELS[:3])
+        self.assertEqual(batcher.stats()['flush_reasons'].get('size'), None)
+
+    def test_failures_and_close(self):
+        batcher = MicroBatcher(self.classifier, max_wait=0.01)
+        with self.assertRaises(Exception):
+            batcher.predict(None, timeout=5)
+        self.assertEqual(batcher.stats()['failed_batches'], 1)
+
+        batcher.close()
+        with self.assertRaises(RuntimeError):
+            batcher.submit(TEXTS[0])
+
+
+if __name__ == '__main__':
+    unittest.main()
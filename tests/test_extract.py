@@ -0,0 +1,160 @@
+import tempfile
+import unittest
+from pathlib import Path
+from extract.extract import EntityExtractor, entity_cache, merge_spans, shard_bounds
+from extract.gazetteer import load_gazetteer
+
+GAZETTEER_FILE = Path(__file__).parent.parent / 'config' / 'gazetteers' / 'ecommerce.yaml'
+
+class TestGazetteer(unittest.TestCase):
+    def setUp(self):
+        self.extractor = EntityExtractor(gazetteer=GAZETTEER_FILE, statistical=False)
+
+    def test_load_gazetteer(self):
+        patterns = load_gazetteer(GAZETTEER_FILE)
+        self.assertIn({'label': 'ORG', 'pattern': 'AudioMax'}, patterns)
+
+    def test_gazetteer_only_pipeline(self):
+        self.assertEqual(self.extractor.nlp.pipe_names, ['entity_ruler'])
+        entities = self.extractor.extract_entities('REV-001 says PROD-001 by AudioMax is great')
+        self.assertEqual(entities, [
+            ('REV-001', 'REVIEW_ID'), ('PROD-001', 'PRODUCT_ID'), ('AudioMax', 'ORG'),
+        ])
+
+    def test_requires_gazetteer(self):
+        with self.assertRaises(ValueError):
+            EntityExtractor(statistical=False)
+
+class TestSharding(unittest.TestCase):
+    def test_shard_bounds_cover_text(self):
+        text = "\n\n".join(f"Paragraph {i}. " + "word " * 40 for i in range(30))
+        bounds = shard_bounds(text, 500, 50)
+
+        self.assertEqual(bounds[0][0], 0)
+        self.assertEqual(bounds[-1][1], len(text))
+        for start, end in bounds:
+            self.assertLessEqual(end - start, 500)
+        for (_, end), (start, _) in zip(bounds, bounds[1:]):
+            self.assertLess(start, end)
+            self.assertGreaterEqual(start, end - 50)
+
+    def test_short_text_is_one_shard(self):
+        self.assertEqual(shard_bounds('short text', 100, 20), [(0, 10)])
+
+    def test_overlap_must_be_under_half_the_shard(self):
+        with self.assertRaises(ValueError):
+            shard_bounds('word ' * 100, 100)
+        with self.assertRaises(ValueError):
+            EntityExtractor(gazetteer=GAZETTEER_FILE, statistical=False, shard_size=300)
+        bounds = shard_bounds('word ' * 20000, 1000, 100)
+        covered = sum(end - start for start, end in bounds)
+        self.assertLess(covered, 1.3 * 100000)
+
+    def test_merge_spans(self):
+        spans = [
+            (0, 8, 'ORG', 'AudioMax'),
+            (0, 8, 'ORG', 'AudioMax'),      # seen by both shards
+            (20, 25, 'ORG', 'Audio'),       # fragment truncated at a cut
+            (20, 28, 'ORG', 'AudioMax'),
+            (30, 34, 'ORG', 'Acme'),
+        ]
+        self.assertEqual(merge_spans(spans), [
+            (0, 8, 'ORG', 'AudioMax'), (20, 28, 'ORG', 'AudioMax'), (30, 34, 'ORG', 'Acme'),
+        ])
+
+    def test_merge_spans_label_conflict_is_deterministic(self):
+        spans = [(0, 4, 'PRODUCT', 'Acme'), (0, 4, 'ORG', 'Acme')]
+        self.assertEqual(merge_spans(spans), [(0, 4, 'ORG', 'Acme')])
+        self.assertEqual(merge_spans(spans[::-1]), [(0, 4, 'ORG', 'Acme')])
+
+    def test_sharded_matches_unsharded(self):
+        text = " ".join(f"Review {i}: PROD-00{i % 9 + 1} by AudioMax." for i in range(200))
+        sharded = EntityExtractor(gazetteer=GAZETTEER_FILE, statistical=False,
+                                  shard_size=300, shard_overlap=40)
+        unsharded = EntityExtractor(gazetteer=GAZETTEER_FILE, statistical=False)
+        self.assertEqual(sharded.extract_entities(text), unsharded.extract_entities(text))
+
+class TestEntityBatching(unittest.TestCase):
+    TEXTS = ['PROD-001 by AudioMax', 'no entities here', 'REV-002 about KeyMaster']
+
+    def setUp(self):
+        self.extractor = EntityExtractor(gazetteer=GAZETTEER_FILE, statistical=False)
+
+    def test_batch_matches_single_calls(self):
+        expected = [self.extractor.extract_entities(text) for text in self.TEXTS]
+        self.assertEqual(self.extractor.process_batch(iter(self.TEXTS), batch_size=2), expected)
+
+        results = list(self.extractor.iter_entities(enumerate(self.TEXTS), as_tuples=True))
+        self.assertEqual([doc_id for doc_id, _, _ in results], [0, 1, 2])
+        self.assertEqual([entities for _, entities, _ in results], expected)
+        self.assertEqual(results[0][2], {'PRODUCT_ID': ['PROD-001'], 'ORG': ['AudioMax']})
+
+class TestEntityCache(unittest.TestCase):
+    TEXTS = ['PROD-001 by AudioMax', 'no entities here', 'REV-002 about KeyMaster']
+
+    def make_extractor(self, cache, gazetteer=GAZETTEER_FILE):
+        return EntityExtractor(gazetteer=gazetteer, statistical=False, cache=cache)
+
+    def test_duplicates_parsed_once(self):
+        extractor = self.make_extractor(entity_cache())
+        parsed = []
+        original = extractor._iter_parsed
+
+        def counting(pairs, *args):
+            pairs = list(pairs)
+            parsed.extend(pairs)
+            return original(pairs, *args)
+
+        extractor._iter_parsed = counting
+        results = extractor.process_batch(self.TEXTS * 5)
+
+        self.assertEqual(len(parsed), 3)
+        self.assertEqual(results, [extractor.extract_entities(text) for text in self.TEXTS] * 5)
+        self.assertEqual(extractor.cache.stats()['misses'], 15)
+
+    def test_cache_cleared_by_gazetteer_change(self):
+        cache = entity_cache()
+        self.make_extractor(cache).process_batch(self.TEXTS)
+        self.make_extractor(cache).process_batch(self.TEXTS)
+        self.assertEqual(cache.stats()['hits'], 3)
+
+        patterns = [{'label': 'BRAND', 'pattern': 'AudioMax'}]
+        changed = self.make_extractor(cache, gazetteer=patterns)
+        self.assertEqual(changed.process_batch(self.TEXTS)[0], [('AudioMax', 'BRAND')])
+        self.assertEqual(cache.stats()['hits'], 3)
+
+    def test_namespace_includes_model_identity(self):
+        extractor = EntityExtractor(model_name='en_core_web_sm', gazetteer=GAZETTEER_FILE,
+                                    lazy=True, cache=entity_cache())
+        extractor._model_version = lambda: '1.0.0'
+        first = extractor.cache_namespace
+        extractor._cache_namespace = None
+        extractor._model_version = lambda: '1.1.0'
+        self.assertNotEqual(extractor.cache_namespace, first)
+
+    def test_disk_persistence(self):
+        with tempfile.TemporaryDirectory() as directory:
+            first = self.make_extractor(entity_cache(disk_path=directory))
+            expected = first.process_batch(self.TEXTS)
+            first.cache.close()
+
+            second = self.make_extractor(entity_cache(disk_path=directory))
+            self.assertEqual(second.process_batch(self.TEXTS), expected)
+            stats = second.cache.stats()
+            self.assertEqual((stats['disk_hits'], stats['misses']), (3, 0))
+            second.cache.close()
+
+class TestEntityTable(unittest.TestCase):
+    def test_offsets_across_shards(self):
+        extractor = EntityExtractor(gazetteer=GAZETTEER_FILE, statistical=False,
+                                    shard_size=30, shard_overlap=10)
+        texts = ['PROD-001 by AudioMax', 'none', 'REV-002 AudioMax and KeyMaster and PROD-003']
+        table = extractor.entity_table(texts)
+
+        self.assertEqual(list(table.columns), ['doc_id', 'start', 'end', 'label', 'text'])
+        self.assertEqual(len(table), 6)
+        for row in table.itertuples():
+            self.assertEqual(texts[row.doc_id][row.start:row.end], row.text)
+
+if __name__ == '__main__':
+    unittest.main()
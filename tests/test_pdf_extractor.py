@@ -0,0 +1,280 @@
+import os
+import tempfile
+import time
+import unittest
+from pathlib import Path
+from extract import pdf_backends
+from extract.pdf_extractor import (PDFExtractor, blocks_to_text, iter_page_texts, page_ranges,
+                                   pdf_text_cache)
+from extract.pdf_guard import GuardedExtractionError
+from tests.helpers import make_pdf
+
+
+class FailingBackend(pdf_backends.PyPDF2Backend):
+    """PyPDF2 backend that fails on the third page"""
+    name = 'failing'
+
+    def iter_pages(self, pdf_path, start=0, end=None):
+        for page_num, text in enumerate(super().iter_pages(pdf_path, start, end), start):
+            if page_num == 2:
+                raise ValueError('corrupt page')
+            yield text
+
+
+class FailingLastBackend(pdf_backends.PyPDF2Backend):
+    """PyPDF2 backend that fails after yielding its last page"""
+    name = 'failing_last'
+
+    def iter_pages(self, pdf_path, start=0, end=None):
+        yield from super().iter_pages(pdf_path, start, end)
+        raise ValueError('corrupt trailer')
+
+
+class HangingBackend(pdf_backends.PyPDF2Backend):
+    """PyPDF2 backend that hangs on the second page"""
+    name = 'hanging'
+
+    def iter_pages(self, pdf_path, start=0, end=None):
+        for page_num, text in enumerate(super().iter_pages(pdf_path, start, end), start):
+            if page_num == 1:
+                time.sleep(30)
+            yield text
+
+    def iter_blocks(self, pdf_path, start=0, end=None):
+        for page_num, blocks in enumerate(super().iter_blocks(pdf_path, start, end), start):
+            if page_num == 1:
+                time.sleep(30)
+            yield blocks
+
+
+class TestPDFExtractor(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.pdf = str(Path(self.tmp.name) / 'doc.pdf')
+        make_pdf(self.pdf, 7, lines_per_page=3)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_page_ranges(self):
+        self.assertEqual(page_ranges(7, 3), [(0, 3), (3, 6), (6, 7)])
+
+    def test_parallel_matches_sequential(self):
+        sequential = PDFExtractor().extract_text(self.pdf)
+        parallel = PDFExtractor(chunk_size=3, workers=2, parallel_min_pages=1)
+        self.assertIn('Page 7 line 2 text', sequential)
+        self.assertEqual(parallel.extract_text(self.pdf), sequential)
+
+    def test_batch_stats(self):
+        missing = str(Path(self.tmp.name) / 'missing.pdf')
+        extractor = PDFExtractor(chunk_size=3, workers=2)
+        stats = extractor.batch_extract([self.pdf, missing], with_stats=True)
+        self.assertEqual(stats[self.pdf]['pages'], 7)
+        self.assertGreater(stats[self.pdf]['pages_per_sec'], 0)
+        self.assertEqual(stats[missing]['text'], '')
+
+    def test_iter_pages_and_chunks(self):
+        extractor = PDFExtractor(chunk_size=3)
+        pages = list(extractor.iter_pages(self.pdf))
+        self.assertEqual([number for number, _ in pages], list(range(1, 8)))
+        chunks = list(extractor.iter_chunks(self.pdf))
+        self.assertEqual(len(chunks), 3)
+        self.assertEqual(''.join(chunks), ''.join(text for _, text in pages))
+
+    def test_batch_sink(self):
+        out_dir = Path(self.tmp.name) / 'out'
+        for workers in (1, 2):
+            outputs = PDFExtractor(chunk_size=3, workers=workers).batch_extract(
+                [self.pdf], sink=out_dir)
+            written = Path(outputs[self.pdf]).read_text(encoding='utf-8')
+            self.assertEqual(written, PDFExtractor().extract_text(self.pdf))
+
+    def test_batch_sink_same_names(self):
+        other = Path(self.tmp.name) / 'other' / 'doc.pdf'
+        other.parent.mkdir()
+        make_pdf(str(other), 2, lines_per_page=1)
+        outputs = PDFExtractor().batch_extract([self.pdf, str(other)],
+                                               sink=Path(self.tmp.name) / 'out')
+        self.assertEqual(len(set(outputs.values())), 2)
+        for pdf_file, output in outputs.items():
+            self.assertEqual(Path(output).read_text(encoding='utf-8'),
+                             PDFExtractor().extract_text(pdf_file))
+
+    def test_failed_file_leaves_no_output(self):
+        pdf_backends.BACKENDS['failing'] = FailingBackend
+        try:
+            out_dir = Path(self.tmp.name) / 'out'
+            outputs = PDFExtractor(backend='failing', fallback=False).batch_extract(
+                [self.pdf], sink=out_dir)
+        finally:
+            del pdf_backends.BACKENDS['failing']
+        self.assertIsNone(outputs[self.pdf])
+        self.assertEqual(list(out_dir.iterdir()), [])
+
+class TestPDFTextCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.pdf = str(Path(self.tmp.name) / 'doc.pdf')
+        self.cache_dir = str(Path(self.tmp.name) / 'cache')
+        make_pdf(self.pdf, 4, lines_per_page=2)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_unchanged_file_served_from_disk(self):
+        first = PDFExtractor(cache=pdf_text_cache(self.cache_dir))
+        expected = first.batch_extract([self.pdf])[self.pdf]
+        self.assertEqual(first.cache_misses, 1)
+
+        second = PDFExtractor(cache=pdf_text_cache(self.cache_dir))
+        stats = second.batch_extract([self.pdf], with_stats=True)[self.pdf]
+        self.assertTrue(stats['cached'])
+        self.assertEqual(stats['text'], expected)
+        self.assertEqual(second.cache_hit_rate, 1.0)
+        self.assertEqual(second.bytes_saved, Path(self.pdf).stat().st_size)
+
+    def test_modified_file_is_parsed_again(self):
+        extractor = PDFExtractor(cache=pdf_text_cache(self.cache_dir))
+        extractor.extract_text(self.pdf)
+        make_pdf(self.pdf, 5, lines_per_page=2)
+        self.assertIn('Page 5 line 1 text', extractor.extract_text(self.pdf))
+        self.assertEqual(extractor.cache_hits, 0)
+
+    def test_same_stat_different_content_is_a_miss(self):
+        extractor = PDFExtractor(cache=pdf_text_cache(self.cache_dir))
+        extractor.extract_text(self.pdf)
+        stat = Path(self.pdf).stat()
+        with open(self.pdf, 'r+b') as f:
+            f.seek(-8, 2)
+            f.write(b'%%EOF\n  ')
+        os.utime(self.pdf, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+
+        extractor.extract_text(self.pdf)
+        self.assertEqual(extractor.cache_hits, 0)
+
+    def test_streaming_bypasses_cache(self):
+        extractor = PDFExtractor(cache=pdf_text_cache(self.cache_dir))
+        self.assertEqual(len(list(extractor.iter_pages(self.pdf))), 4)
+        self.assertEqual(extractor.cache.stats()['entries'], 0)
+
+
+class TestPDFBackends(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.pdf = str(Path(self.tmp.name) / 'doc.pdf')
+        make_pdf(self.pdf, 5, lines_per_page=2)
+        pdf_backends.BACKENDS['failing'] = FailingBackend
+
+    def tearDown(self):
+        del pdf_backends.BACKENDS['failing']
+        self.tmp.cleanup()
+
+    def test_auto_selects_installed_backend(self):
+        self.assertIn(PDFExtractor().backend, pdf_backends.available_backends())
+
+    def test_fallback_resumes_at_failed_page(self):
+        expected = PDFExtractor(backend='pypdf2').extract_text(self.pdf)
+        # Pin the fallback so the comparison does not depend on which engines are installed
+        extractor = PDFExtractor(backend=['failing', 'pypdf2'], fallback=False)
+        self.assertEqual(extractor.extract_text(self.pdf), expected)
+        self.assertEqual(PDFExtractor(backend='failing', fallback=False).extract_text(self.pdf), '')
+
+    @unittest.skipUnless('pdfminer' in pdf_backends.available_backends(), 'needs pdfminer.six')
+    def test_pdfminer_page_ranges(self):
+        backend = pdf_backends.get_backend('pdfminer')
+        for start, end in ((0, 0), (3, 3), (4, 2)):
+            self.assertEqual(list(backend.iter_pages(self.pdf, start, end)), [])
+            self.assertEqual(list(backend.iter_blocks(self.pdf, start, end)), [])
+        self.assertEqual(len(list(backend.iter_pages(self.pdf, 1, 3))), 2)
+        self.assertEqual(len(list(backend.iter_pages(self.pdf, 3))), 2)
+
+    @unittest.skipUnless('pdfminer' in pdf_backends.available_backends(), 'needs pdfminer.six')
+    def test_fallback_after_last_page_adds_nothing(self):
+        pdf_backends.BACKENDS['failing_last'] = FailingLastBackend
+        try:
+            texts = list(iter_page_texts(self.pdf, ['failing_last', 'pdfminer'], 0, 5))
+        finally:
+            del pdf_backends.BACKENDS['failing_last']
+        self.assertEqual(len(texts), 5)
+
+class TestGuardedExtraction(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.pdf = str(Path(self.tmp.name) / 'doc.pdf')
+        make_pdf(self.pdf, 3, lines_per_page=2)
+        pdf_backends.BACKENDS['hanging'] = HangingBackend
+
+    def tearDown(self):
+        del pdf_backends.BACKENDS['hanging']
+        self.tmp.cleanup()
+
+    def test_page_timeout_fails_file(self):
+        extractor = PDFExtractor(backend='hanging', fallback=False, guarded=True, page_timeout=0.5)
+        stats = extractor.extract_with_stats(self.pdf)
+        self.assertEqual(stats['failure']['reason'], 'page_timeout')
+        self.assertEqual(stats['failure']['page'], 2)
+        self.assertEqual(extractor.failed_count, 1)
+
+    def test_skip_bad_pages(self):
+        extractor = PDFExtractor(backend='hanging', fallback=False, guarded=True,
+                                 page_timeout=0.5, skip_bad_pages=True)
+        missing = str(Path(self.tmp.name) / 'missing.pdf')
+        stats = extractor.batch_extract([self.pdf, missing], with_stats=True)
+        self.assertIsNone(stats[self.pdf]['failure'])
+        self.assertEqual(stats[self.pdf]['skipped_pages'], [2])
+        self.assertEqual(stats[self.pdf]['pages'], 2)
+        self.assertEqual(stats[missing]['failure']['reason'], 'error')
+
+    def test_streaming_is_guarded(self):
+        extractor = PDFExtractor(backend='hanging', fallback=False, guarded=True, page_timeout=0.5)
+        pages = extractor.iter_pages(self.pdf)
+        self.assertEqual(next(pages)[0], 1)
+        with self.assertRaises(GuardedExtractionError) as raised:
+            next(pages)
+        self.assertEqual(raised.exception.failure['reason'], 'page_timeout')
+        self.assertEqual(raised.exception.failure['page'], 2)
+
+    def test_streaming_skips_bad_pages(self):
+        extractor = PDFExtractor(backend='hanging', fallback=False, guarded=True,
+                                 page_timeout=0.5, skip_bad_pages=True)
+        self.assertEqual([number for number, _ in extractor.iter_pages(self.pdf)], [1, 3])
+        self.assertEqual(len(list(extractor.iter_chunks(self.pdf, pages_per_chunk=1))), 2)
+
+    def test_blocks_are_guarded(self):
+        extractor = PDFExtractor(backend='hanging', fallback=False, guarded=True, page_timeout=0.5)
+        self.assertEqual(extractor.extract_blocks(self.pdf), [])
+        self.assertEqual(extractor.failed_count, 1)
+
+def report_line(page, line):
+    if line == 0:
+        return 'ACME Quarterly Report'
+    if line == 4:
+        return f'Page {page + 1} of 6'
+    return f'Revenue item {page * 10 + line} grew'
+
+
+class TestLayoutBlocks(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.pdf = str(Path(self.tmp.name) / 'report.pdf')
+        make_pdf(self.pdf, 6, lines_per_page=5, line_text=report_line)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_blocks_have_page_and_index(self):
+        blocks = list(PDFExtractor().iter_blocks(self.pdf))
+        self.assertEqual(len(blocks), 30)
+        self.assertEqual((blocks[5]['page'], blocks[5]['index']), (2, 0))
+        self.assertEqual(blocks[5]['text'], 'ACME Quarterly Report')
+
+    def test_drop_headers_and_footers(self):
+        blocks = PDFExtractor().extract_blocks(self.pdf)
+        texts = [block['text'] for block in blocks]
+        self.assertEqual(len(blocks), 18)
+        self.assertNotIn('ACME Quarterly Report', texts)
+        self.assertNotIn('Page 3 of 6', texts)
+        self.assertIn('Revenue item 21 grew', blocks_to_text(blocks))
+
+if __name__ == '__main__':
+    unittest.main()
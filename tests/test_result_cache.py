@@ -0,0 +1,77 @@
+import tempfile
+import unittest
+from common.result_cache import LRUCache, ResultCache, content_hash
+from scrub.clean import CachedNormalizer, clean_documents, normalize_text
+
+class TestResultCache(unittest.TestCase):
+    def test_lru_evicts_by_count_and_size(self):
+        cache = LRUCache(max_entries=2, max_bytes=10)
+        cache.set('a', 'xxxx')
+        cache.set('b', 'yyyy')
+        cache.get('a')
+        cache.set('c', 'zzzz')
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(cache.get('a'), 'xxxx')
+        cache.set('d', 'wwwwwwww')
+        self.assertEqual(len(cache), 1)
+        self.assertLessEqual(cache.current_bytes, 10)
+
+    def test_disk_store_survives_new_instance(self):
+        with tempfile.TemporaryDirectory() as directory:
+            key = content_hash('payload')
+            first = ResultCache(disk_path=directory)
+            first.set(key, 'value')
+            first.close()
+
+            second = ResultCache(disk_path=directory)
+            self.assertEqual(second.get(key), 'value')
+            self.assertEqual(second.stats()['disk_hits'], 1)
+            second.close()
+
+    def test_cached_normalizer_counts_hits(self):
+        normalizer = CachedNormalizer(max_entries=10)
+        for _ in range(3):
+            self.assertEqual(normalizer.normalize('<b>Hi</b>  there'), normalize_text('<b>Hi</b>  there'))
+        stats = normalizer.stats()
+        self.assertEqual((stats['hits'], stats['misses']), (2, 1))
+    def test_worker_counts_reach_parent(self):
+        documents = [{'content': f'<p>Doc   {i % 5}</p>'} for i in range(40)]
+        normalizer = CachedNormalizer(max_entries=10)
+        results = list(clean_documents(documents, workers=2, chunk_size=4, normalizer=normalizer))
+
+        self.assertEqual(results[7]['content'], normalize_text('<p>Doc   2</p>'))
+        stats = normalizer.stats()
+        self.assertEqual(stats['hits'] + stats['misses'], 40)
+        # One cache per worker, kept across chunks: at most 5 misses each
+        self.assertLessEqual(stats['misses'], 10)
+
+    def test_disk_limit_shared_by_instances(self):
+        with tempfile.TemporaryDirectory() as directory:
+            caches = [ResultCache(disk_path=directory, disk_max_bytes=8000, num_shards=1)
+                      for _ in range(4)]
+            for i in range(200):
+                caches[i % 4].set(content_hash(str(i)), 'x' * 100)
+
+            conn = caches[0].disk._connections[0]
+            total = conn.execute("SELECT SUM(size) FROM cache").fetchone()[0]
+            self.assertLessEqual(total, 8000)
+            self.assertEqual(conn.execute("SELECT total FROM usage").fetchone()[0], total)
+            self.assertGreater(sum(cache.disk.evictions for cache in caches), 0)
+            for cache in caches:
+                cache.close()
+
+    def test_disk_reads_batch_recency_updates(self):
+        with tempfile.TemporaryDirectory() as directory:
+            cache = ResultCache(disk_path=directory, num_shards=1)
+            key = content_hash('payload')
+            cache.set(key, 'value')
+            cache.memory.clear()
+
+            self.assertEqual(cache.get(key), 'value')
+            self.assertFalse(cache.disk._connections[0].in_transaction)
+            self.assertIn(key, cache.disk._touched[0])
+            cache.close()
+            self.assertEqual(cache.disk._touched, {})
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,202 @@
+import unittest
+import io
+from pathlib import Path
+from scrub.clean import TextNormalizer, normalize_text, normalize_stream, clean_documents
+from scrub.dedup import NearDuplicateIndex, dedup_documents
+from scrub.html_text import strip_html
+from scrub.rules import compile_rules, load_rules
+
+RULES_FILE = Path(__file__).parent.parent / 'config' / 'scrub_rules.yaml'
+
+class TestTextNormalizer(unittest.TestCase):
+    def setUp(self):
+        self.normalizer = TextNormalizer()
+
+    def test_matches_legacy_output(self):
+        samples = [
+            '<p>Hello   <b>World</b>!</p>',
+            '  leading & trailing  ',
+            'a & b',
+            '<unclosed tag\nnext line>',
+            'café 　 日本\t\n end',
+            'a \ud800 b',
+        ]
+        expected = [
+            'Hello World!',
+            'leading  trailing',
+            'a  b',
+            'unclosed tag next line',
+            'café 日本 end',
+            'a  b',
+        ]
+        for sample, want in zip(samples, expected):
+            self.assertEqual(self.normalizer.normalize(sample), want)
+
+    def test_unicode_normalization(self):
+        normalizer = TextNormalizer(unicode_form='NFKC', strip_zero_width=True,
+                                    fold_punctuation=True)
+        self.assertEqual(normalizer.normalize('Cafe\u0301 \ufb01ne\u200b \u2014 wait\u2026'),
+                         'Café fine - wait...')
+        self.assertEqual(normalizer.normalize('Cafe\u0301'), normalizer.normalize('Caf\u00e9'))
+
+    def test_empty_input(self):
+        self.assertEqual(normalize_text(''), '')
+        self.assertEqual(normalize_text(None), '')
+
+class TestNormalizeStream(unittest.TestCase):
+    def test_matches_whole_document(self):
+        text = '  <div class="a">Hello,\t  <b>World</b></div> &  bye <unclosed\nline  '
+        for size in (1, 2, 3, 5, 8, 13):
+            chunks = [text[i:i + size] for i in range(0, len(text), size)]
+            self.assertEqual(''.join(normalize_stream(chunks)), normalize_text(text))
+
+    def test_boilerplate_matches_whole_document(self):
+        normalizer = TextNormalizer(html_mode='parser', remove_boilerplate=True)
+        texts = ['<p>Read <a href="/x">more news</a> here</p>',
+                 '<div>Story <a href="/a">one</a> and two words</div><nav>x</nav><p>Body</p>']
+        for text in texts:
+            for size in (1, 3, 7, 11, 24):
+                chunks = [text[i:i + size] for i in range(0, len(text), size)]
+                self.assertEqual(''.join(normalizer.normalize_stream(chunks)),
+                                 normalizer.normalize(text), (text, size))
+
+    def test_reads_file_objects(self):
+        text = '<p>Line one</p>\n\n<p>Line   two</p>' * 50
+        result = ''.join(normalize_stream(io.StringIO(text), chunk_size=16))
+        self.assertEqual(result, normalize_text(text))
+
+class TestStripHtml(unittest.TestCase):
+    def test_drops_scripts_comments_and_decodes_entities(self):
+        html = '<p>Fish &amp; chips<script>var a = "<b>";</script></p><!-- note --><style>p {}</style>'
+        self.assertEqual(strip_html(html), 'Fish & chips\n')
+
+    def test_boilerplate_removal(self):
+        html = ('<nav><a href="/">Home</a></nav>'
+                '<div><a href="/a">A</a> | <a href="/b">B</a></div>'
+                '<p>Body text with a <a href="/c">link</a> inside.</p>'
+                '<footer>Copyright</footer>')
+        self.assertEqual(strip_html(html, remove_boilerplate=True),
+                         'Body text with a link inside.\n')
+
+    def test_parser_mode_normalizer(self):
+        normalizer = TextNormalizer(html_mode='parser')
+        self.assertEqual(normalizer.normalize('<p>a&nbsp;b</p><p>c</p>'), 'a b c')
+
+class TestScrubRules(unittest.TestCase):
+    def test_default_rules_match_normalize_text(self):
+        normalizer = TextNormalizer(rules=load_rules(RULES_FILE, 'unknown-source'))
+        for sample in ('<p>Hello   <b>World</b>!</p>', '  a & b  ', 'café\t日本 $5'):
+            self.assertEqual(normalizer.normalize(sample), normalize_text(sample))
+
+    def test_merged_passes(self):
+        program = compile_rules([
+            {'replace': '%', 'with': ' percent'},
+            {'replace': r'\$', 'with': 'USD '},
+            {'strip': r'\[\d+\]'},
+            {'strip': r'[*#]'},
+            {'collapse': r'\s'},
+        ])
+        self.assertEqual(len(program.passes), 3)
+        self.assertEqual(program.apply('5%  of $3 [1]*#'), '5 percent of USD 3 ')
+        self.assertIs(compile_rules(list(program.rules)), program)
+
+    def test_matches_sequential_application(self):
+        rule_sets = [
+            [{'strip': 'c'}, {'strip': 'ab'}],
+            [{'replace': 'foo', 'with': 'bar'}, {'replace': 'bar', 'with': 'baz'}],
+            [{'strip': 'x'}, {'replace': r'\bcat', 'with': 'dog'}],
+            [{'replace': r'\bInc\.', 'with': 'Inc'}, {'replace': r'\bLtd\.', 'with': 'Limited'},
+             {'strip': r'\[\d+\]'}, {'strip': r'&[a-z]+;'}, {'collapse': r'\s'}],
+            [{'replace': '%', 'with': ' percent'}, {'replace': r'\$', 'with': 'USD '}],
+            [{'strip': r'\[\d+\]'}, {'strip': r'[*#]'}, {'strip': r'\d'}],
+            [{'collapse': r'-'}, {'collapse': r'\s'}],
+            [{'replace': 'a', 'with': 'b'}, {'replace': 'b', 'with': 'a'}],
+        ]
+        samples = ['acb', 'foo bar', 'xcat cat', 'Acme Inc. [1]  and Foo Ltd.&amp;',
+                   '5% of $3', 'a[12]*b#7', 'a - -  b', 'abba']
+        for rules in rule_sets:
+            program = compile_rules(rules)
+            for sample in samples:
+                expected = sample
+                for rule in rules:
+                    expected = compile_rules([rule]).apply(expected)
+                self.assertEqual(program.apply(sample), expected, (rules, sample))
+
+    def test_rules_reject_chunked_input_eagerly(self):
+        normalizer = TextNormalizer(rules=load_rules(RULES_FILE))
+        with self.assertRaises(ValueError):
+            normalize_stream(['<p>a</p>'], normalizer=normalizer)
+
+    def test_trim_value(self):
+        self.assertEqual(compile_rules([{'trim': False}]).apply('  x '), '  x ')
+        self.assertEqual(compile_rules([{'trim': True}]).apply('  x '), 'x')
+        with self.assertRaises(ValueError):
+            compile_rules([{'trim': 'yes'}])
+
+class TestDedup(unittest.TestCase):
+    def setUp(self):
+        base = ' '.join(f'sentence number {i} about data harvesting' for i in range(40))
+        self.documents = [
+            {'id': 'a', 'content': base},
+            {'id': 'b', 'content': 'completely different text about cooking pasta at home'},
+            {'id': 'c', 'content': base + ' page 2'},
+        ]
+
+    def test_flags_near_duplicates(self):
+        results = list(dedup_documents(self.documents, mode='flag'))
+        self.assertEqual(results[2]['duplicate_of'], 'a')
+        self.assertNotIn('duplicate_of', results[1])
+
+    def test_saved_index_is_reused(self):
+        import os, tempfile
+        index = NearDuplicateIndex(capacity=10)
+        list(dedup_documents(self.documents[:2], index=index))
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'index.npz')
+            index.save(path)
+            results = list(dedup_documents(self.documents[2:], index=NearDuplicateIndex.load(path)))
+        self.assertEqual(results, [])
+
+    def test_saved_ids_keep_their_type(self):
+        import os, tempfile
+        index = NearDuplicateIndex(capacity=10)
+        ids = [7, None]
+        for doc_id, document in zip(ids, self.documents[:2]):
+            index.check(doc_id, document['content'])
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'index.npz')
+            index.save(path)
+            loaded = NearDuplicateIndex.load(path)
+        self.assertEqual(loaded.doc_ids, [7, None])
+        self.assertEqual(loaded.check('c', self.documents[2]['content'])[0], 7)
+
+    def test_grows_lazily_and_evicts_at_capacity(self):
+        index = NearDuplicateIndex(capacity=5, initial_capacity=2)
+        self.assertEqual(len(index.signatures), 2)
+        for i in range(7):
+            index.check(i, f'document {i} ' + 'unique words ' * i + 'x' * 40 * i)
+        self.assertEqual(len(index.signatures), 5)
+        self.assertEqual(index.size, 5)
+        self.assertEqual(sorted(index.doc_ids), [2, 3, 4, 5, 6])
+
+class TestCleanDocuments(unittest.TestCase):
+    def make_documents(self):
+        return [{'id': i, 'content': f'<p>Doc   {i} &amp;</p>'} for i in range(25)] + [{'id': 'empty'}]
+
+    def test_preserves_order_across_workers(self):
+        expected = [normalize_text(d['content']) for d in self.make_documents()[:-1]]
+        for workers in (1, 2):
+            results = list(clean_documents(self.make_documents(), workers=workers, chunk_size=4))
+            self.assertEqual([d['content'] for d in results[:-1]], expected)
+            self.assertEqual(results[-1], {'id': 'empty'})
+
+    def test_copy_flag(self):
+        documents = self.make_documents()
+        list(clean_documents(documents, workers=1, copy=True))
+        self.assertEqual(documents[0]['content'], '<p>Doc   0 &amp;</p>')
+
+        list(clean_documents(documents, workers=1))
+        self.assertEqual(documents[0]['content'], 'Doc 0 amp')
+
+if __name__ == '__main__':
+    unittest.main()